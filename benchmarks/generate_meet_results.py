@@ -0,0 +1,105 @@
+import argparse
+import logging
+import os
+import random
+
+import openpyxl
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+GENDERS = ['Girls', 'Boys', 'Mixed']
+AGE_GROUPS = ['8 & Under', '9-10', '11-12', '12 & Under', '13-14', '13 & Over', '15 & Over']
+INDIVIDUAL_EVENTS = [(50, 'Freestyle'), (100, 'Freestyle'), (200, 'Freestyle'), (50, 'Backstroke'), (100, 'Backstroke'),
+                     (50, 'Breaststroke'), (100, 'Breaststroke'), (50, 'Butterfly'), (100, 'Butterfly'), (200, 'IM')]
+RELAY_EVENTS = [(200, 'Freestyle Relay'), (200, 'Medley Relay')]
+TEAMS = ['Rivers Swim Club', 'Harbour Sharks', 'Valley Aquatics', 'Northside Dolphins', 'City Marlins', 'Lakes Swim Team']
+FIRST_NAMES = ['Jane', 'Tom', 'Aroha', 'Liam', 'Mia', 'Noah', 'Ava', 'Nikau', 'Isla', 'Leo', 'Ruby', 'Eli']
+LAST_NAMES = ['Smith', 'Brown', 'Wilson', 'Taylor', 'Ngata', 'Walker', 'Young', 'King', 'Clarke', 'Reid', 'Kaur', 'Singh']
+
+# Number of columns in a results sheet
+SHEET_COLUMNS = 14
+
+# Function to format seconds as a results time (SS.SS or M:SS.SS)
+def format_time(seconds):
+    minutes, seconds = divmod(seconds, 60)
+    return f"{int(minutes)}:{seconds:05.2f}" if minutes else f"{seconds:.2f}"
+
+# Function to build one swimmer (or relay team) result row
+def result_row(rng, place, distance, relay, swimmers):
+    base = distance * rng.uniform(0.55, 0.95)
+    seed = None if rng.random() < 0.1 else base * rng.uniform(0.97, 1.06)
+    finals = base
+    outcome = rng.random()
+    row = [None] * SHEET_COLUMNS
+    if outcome < 0.04:
+        row[7] = 'DQ' if rng.random() < 0.5 else f"DQ {format_time(finals)}"
+        row[13] = '---'
+    elif outcome < 0.06:
+        row[7] = 'DNF'
+        row[13] = '---'
+    else:
+        row[7] = format_time(finals)
+        row[13] = place
+        row[10] = max(0, 10 - place) or None
+        row[11] = rng.choice([None, None, 50])
+    row[0] = str(place) if row[13] != '---' else '---'
+    row[4] = format_time(seed) if seed else 'NT'
+    qualification = rng.random()
+    row[9] = 'ADV' if qualification < 0.08 else 'DEV' if qualification < 0.2 else None
+    if relay:
+        row[1] = rng.choice(TEAMS)
+        row[3] = rng.choice(['A', 'B', 'C'])
+    else:
+        row[1], age, row[3] = rng.choice(swimmers)
+        row[2] = str(age)
+    return row
+
+# Function to write a synthetic results workbook
+def generate_workbook(file_path, rows, seed=0, swimmers_per_event=24, meet_name='Synthetic Championships'):
+    """Write an .xlsx results workbook with about `rows` result rows.
+
+    The sheet follows the layout described in the README: a header row, a
+    "Results - " title row, event header rows, label rows, 14 columns of
+    results with NT/DQ/DNF times, ADV/DEV qualifiers and relays.
+    """
+    rng = random.Random(seed)
+    swimmers = [
+        (f"{rng.choice(LAST_NAMES)}, {rng.choice(FIRST_NAMES)} {chr(65 + i % 26)}", rng.randint(8, 17), rng.choice(TEAMS))
+        for i in range(max(50, rows // 8))
+    ]
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('Results')
+    sheet.append(['Licensed to Synthetic Swim Club', None, None, None, None, None, None, "HY-TEK's MEET MANAGER"] + [None] * 6)
+    sheet.append([f"Results - {meet_name}"] + [None] * (SHEET_COLUMNS - 1))
+
+    written = 0
+    event_number = 0
+    while written < rows:
+        event_number += 1
+        relay = rng.random() < 0.15
+        distance, stroke = rng.choice(RELAY_EVENTS if relay else INDIVIDUAL_EVENTS)
+        gender = rng.choice(GENDERS if relay else GENDERS[:2])
+        age_group = rng.choice(AGE_GROUPS)
+        sheet.append([f"(Event {event_number}  {gender} {age_group} {distance} SC Meter {stroke})"] + [None] * (SHEET_COLUMNS - 1))
+        sheet.append(['Name', 'Name', 'Age', 'Team', 'Seed Time', None, None, 'Finals Time', None, None, 'Points', None, None, 'Rank'])
+        for place in range(1, min(swimmers_per_event, rows - written) + 1):
+            sheet.append(result_row(rng, place, distance, relay, swimmers))
+            written += 1
+        if rng.random() < 0.3:
+            sheet.append([None, 'ADV = Advanced time, DEV = Development time'] + [None] * (SHEET_COLUMNS - 2))
+    workbook.save(file_path)
+    logger.info(f"Wrote {written} result rows in {event_number} events to {file_path}")
+    return file_path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic swim meet results workbooks")
+    parser.add_argument('--output-dir', default='meet_results', help='Directory to write the workbooks to')
+    parser.add_argument('--rows', type=int, nargs='+', default=[200], help='Result rows per workbook (e.g. 200 for a club meet, 100000 for a championship)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for index, rows in enumerate(args.rows, start=1):
+        generate_workbook(os.path.join(args.output_dir, f"2025-meet{index}-results.xlsx"), rows, seed=args.seed + index)
@@ -0,0 +1,102 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from generate_meet_results import generate_workbook
+
+# Benchmark the checked-out source when the package is not installed
+try:
+    import swim_results_converter  # noqa: F401
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Function to read the peak resident set size of this process in MB (None where unsupported)
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+# Function to benchmark one workbook through every stage (run in a fresh worker process)
+def benchmark_workbook(file_path, output_dir, engine, bonus_points):
+    # Keep the stage logging out of the benchmark output
+    logging.getLogger().setLevel(logging.WARNING)
+    from swim_results_converter import standardize_swim_data, aggregate_swim_data, schema
+
+    stages = {}
+    def timed(stage, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        stages[stage] = round(time.perf_counter() - start, 4)
+        return result
+
+    title, df = timed('read_workbook', standardize_swim_data.read_workbook, file_path)
+    meet_name, meet_date = timed('extract_meet_info', standardize_swim_data.extract_meet_info, file_path, title)
+    standardize = standardize_swim_data.standardize_rows if engine == 'rowwise' else standardize_swim_data.standardize_frame
+    standardized_df = timed('standardize', standardize, df, meet_name, meet_date, bonus_points)
+    standardized_file = os.path.join(output_dir, standardize_swim_data.standardized_filename(file_path))
+    timed('write_standardized', schema.write_csv, standardized_df, standardized_file)
+    prepared_df, input_filename = timed('read_standardized', aggregate_swim_data.process_file, standardized_file)
+    aggregated_df = timed('aggregate', aggregate_swim_data.aggregate_data, prepared_df)
+    aggregated_file = os.path.join(output_dir, aggregate_swim_data.aggregated_filename(input_filename))
+    timed('write_aggregated', lambda: aggregated_df.to_csv(aggregated_file, index=False))
+
+    total = sum(stages.values())
+    return {
+        'engine': engine,
+        'rows_in': len(df),
+        'rows_out': len(standardized_df),
+        'seconds': round(total, 4),
+        'rows_per_second': round(len(standardized_df) / total) if total else None,
+        'peak_rss_mb': peak_rss_mb(),
+        'stages': stages,
+    }
+
+# Main function
+def main(args):
+    bonus_points = {"DEV": "3", "ADV": "6", "NT": "1", "PB": "2"}
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for rows in args.rows:
+            file_path = os.path.join(work_dir, f"2025-meet{rows}-results.xlsx")
+            generate_workbook(file_path, rows, seed=args.seed)
+            for engine in args.engines:
+                for repeat in range(args.repeat):
+                    # A fresh process per run keeps peak RSS per workbook size
+                    with ProcessPoolExecutor(max_workers=1) as executor:
+                        result = executor.submit(benchmark_workbook, file_path, work_dir, engine, bonus_points).result()
+                    result['rows'] = rows
+                    results.append(result)
+                    logger.info(
+                        f"{rows:>7} rows  {engine:<10}  {result['seconds']:>8.3f} s  "
+                        f"{result['rows_per_second'] or 0:>9} rows/s  peak RSS {result['peak_rss_mb']} MB  "
+                        + '  '.join(f"{stage}={seconds:.3f}" for stage, seconds in result['stages'].items())
+                    )
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Benchmark report saved to {args.report}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the standardization and aggregation stages on synthetic workbooks")
+    parser.add_argument('--rows', type=int, nargs='+', default=[200, 5000, 100000], help='Result rows per synthetic workbook')
+    parser.add_argument('--engines', nargs='+', default=['vectorized'], choices=['vectorized', 'rowwise'], help='Standardization engines to benchmark')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per workbook size and engine')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic workbooks')
+    parser.add_argument('--report', help='Optional JSON file for the results')
+    args = parser.parse_args()
+    main(args)
@@ -14,6 +14,7 @@ setup(
     entry_points={
         "console_scripts": [
             "swim-results-converter=swim_results_converter.run_swim_data_pipeline:main",
+            "swim-results-server=swim_results_converter.server:main",
         ],
     },
     python_requires=">=3.8",
@@ -1,59 +1,112 @@
 import pandas as pd
 import os
 import argparse
+import functools
 import logging
 import uuid
 
+try:
+    from . import batch
+    from . import formats
+    from . import identity
+    from . import report
+    from . import rollups
+    from . import schema
+    from . import season
+except ImportError:
+    import batch
+    import formats
+    import identity
+    import report
+    import rollups
+    import schema
+    import season
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Function to process a single standardized CSV file
-def process_file(file_path):
+# Function to prepare standardized data (read from a file or handed over in memory) for aggregation
+def prepare_data(df, source, skipped=None):
+    # skipped, when given, is a dict that receives the number of rows dropped per reason
+    # Ensure required columns exist
+    required_columns = ['MeetName', 'Date', 'Gender', 'AgeGroup', 'SwimmerName', 'Age', 'Team', 
+                       'PlacePoints', 'PBPoints','TimePoints','TotalPoints','Qualification']
+    if not all(col in df.columns for col in required_columns):
+        logger.error(f"Missing required columns in {source}")
+        return None
+    
+    # Handle missing or invalid data
+    rows_in = len(df)
+    df = df.dropna(subset=['SwimmerName', 'Gender', 'AgeGroup', 'Team']).copy()
+    report.count_skipped(skipped, {'missing_swimmer_details': rows_in - len(df)})
+    df['PlacePoints'] = pd.to_numeric(df['PlacePoints'], errors='coerce').fillna(0).astype('int32')
+    df['TimePoints'] = pd.to_numeric(df['TimePoints'], errors='coerce').fillna(0).astype('int32')
+    df['PBPoints'] = pd.to_numeric(df['PBPoints'], errors='coerce').fillna(0).astype('int32')
+    # Points of each result as standardized, for the event leaderboards (the sums use whole points)
+    df['ResultPoints'] = pd.to_numeric(df['TotalPoints'], errors='coerce').astype('float32')
+    df['TotalPoints'] = pd.to_numeric(df['TotalPoints'], errors='coerce').fillna(0).astype('int32')
+    df['Qualification'] = df['Qualification'].fillna('').astype(str)
+    
+    # Flag ADV and DEV qualifications (summed into counts by aggregate_data)
+    df['QualificationADV'] = df['Qualification'].str.contains('ADV', na=False).astype('boolean')
+    df['QualificationDEV'] = df['Qualification'].str.contains('DEV', na=False).astype('boolean')
+    
+    # Standardized files written before SwimmerIDs were added get them from the names
+    if 'SwimmerID' not in df.columns:
+        df['SwimmerID'] = identity.swimmer_ids(df['SwimmerName'], df['Team'], df['Event'].str.contains('Relay', na=False))
+    
+    return df
+
+# Name of the season table written next to the aggregated files
+SEASON_FILENAME = 'season_results.csv'
+
+# Function to process a single standardized file (CSV, Parquet, Feather or JSONL)
+def process_file(file_path, file_report=None):
     try:
         logger.info(f"Processing file: {file_path}")
-        # Read the CSV file
-        df = pd.read_csv(file_path)
-        
-        # Ensure required columns exist
-        required_columns = ['MeetName', 'Date', 'Gender', 'AgeGroup', 'SwimmerName', 'Age', 'Team', 
-                           'PlacePoints', 'PBPoints','TimePoints','TotalPoints','Qualification']
-        if not all(col in df.columns for col in required_columns):
-            logger.error(f"Missing required columns in {file_path}")
-            return None, None
-        
-        # Handle missing or invalid data
-        df = df.dropna(subset=['SwimmerName', 'Gender', 'AgeGroup', 'Team'])
-        df['PlacePoints'] = pd.to_numeric(df['PlacePoints'], errors='coerce').fillna(0).astype(int)
-        df['TimePoints'] = pd.to_numeric(df['TimePoints'], errors='coerce').fillna(0).astype(int)
-        df['PBPoints'] = pd.to_numeric(df['PBPoints'], errors='coerce').fillna(0).astype(int)
-        df['TotalPoints'] = pd.to_numeric(df['TotalPoints'], errors='coerce').fillna(0).astype(int)
-        df['Qualification'] = df['Qualification'].fillna('').astype(str)
-        
-        # Calculate ADV and DEV counts
-        df['QualificationADV'] = df['Qualification'].str.contains('ADV', na=False).astype(int)
-        df['QualificationDEV'] = df['Qualification'].str.contains('DEV', na=False).astype(int)
+        with report.stage(file_report, 'read_standardized') as stage:
+            # Read the file straight into the standardized schema
+            df = formats.read_standardized(file_path)
+            
+            report.count_rows(stage, rows_in=len(df))
+            df = prepare_data(df, file_path, skipped=stage.setdefault('skipped', {}))
+            if df is None:
+                return None, None
+            report.count_rows(stage, rows_out=len(df))
         
         return df, os.path.basename(file_path)
     except Exception as e:
         logger.error(f"Error processing file {file_path}: {e}")
         return None, None
 
-# Function to aggregate data for a single file
-def aggregate_data(df):
-    # Filter out relay events for individual swimmer aggregation
-    individual_df = df[~df['Event'].str.contains('Relay', na=False)]
-    
-    # Aggregate by SwimmerName, Gender, AgeGroup, Team, MeetName, and Date
-    aggregated = individual_df.groupby(['MeetName', 'Date', 'Gender', 'AgeGroup', 'SwimmerName', 'Age', 'Team']).agg({
-        'PlacePoints': 'sum',
-        'TimePoints': 'sum',
-        'PBPoints': 'sum',
-        'TotalPoints': 'sum',
-        'QualificationADV': 'sum',
-        'QualificationDEV': 'sum'
-    }).reset_index()
-    
+# Columns of the aggregated files
+AGGREGATED_COLUMNS = [
+    'MeetName', 'Date', 'Gender', 'AgeGroup', 'SwimmerName', 'Age', 'Team', 'PlacePoints', 'TimePoints', 'PBPoints', 'TotalPoints',
+    'QualificationADVCount', 'QualificationDEVCount', 'SwimmerID',
+]
+
+# Group keys of the aggregation, and how the other columns are combined within a group
+GROUP_KEYS = ['MeetName', 'Date', 'Gender', 'AgeGroup', 'SwimmerID', 'Age']
+GROUP_COLUMNS = {
+    'SwimmerName': 'first',
+    'Team': 'first',
+    'PlacePoints': 'sum',
+    'TimePoints': 'sum',
+    'PBPoints': 'sum',
+    'TotalPoints': 'sum',
+    'QualificationADV': 'sum',
+    'QualificationDEV': 'sum'
+}
+
+# Function to sum prepared results (or partial sums of earlier chunks) per group
+def group_sums(df):
+    # Aggregate by SwimmerID, Age, Gender, AgeGroup, MeetName, and Date, so spelling variants of a name count as one swimmer
+    # (observed=True groups on the category codes present instead of every combination)
+    return df.groupby(GROUP_KEYS, observed=True).agg(GROUP_COLUMNS).reset_index()
+
+# Function to turn the sums per group into the aggregated layout
+def finish_aggregated(aggregated):
     # Calculate TotalPoints
     # aggregated['TotalPoints'] = aggregated['PlacePoints'] + aggregated['TimePoints'] + aggregated['PBPoints']
     aggregated['TotalPoints'] = aggregated['TotalPoints'] 
@@ -64,52 +117,197 @@ def aggregate_data(df):
         'QualificationDEV': 'QualificationDEVCount'
     })
     
-    # Sort by SwimmerName, MeetName, and Date for readability
-    aggregated = aggregated.sort_values(['SwimmerName', 'MeetName', 'Date'])
+    # Sort by SwimmerName, MeetName, and Date for readability (ties stay in meet, gender and age group order)
+    aggregated = aggregated[AGGREGATED_COLUMNS].sort_values(['MeetName', 'Date', 'Gender', 'AgeGroup', 'SwimmerName', 'Age', 'Team'])
+    aggregated = aggregated.reset_index(drop=True).sort_values(['SwimmerName', 'MeetName', 'Date'])
+    
+    return schema.aggregated(aggregated)
+
+# Function to drop relay results, which are not aggregated per swimmer
+def individual_results(df):
+    return df[~df['Event'].str.contains('Relay', na=False)]
+
+# Function to aggregate data for a single file
+def aggregate_data(df):
+    # Filter out relay events for individual swimmer aggregation
+    return finish_aggregated(group_sums(individual_results(df)))
+
+# Function to aggregate a standardized file chunk by chunk
+def aggregate_chunks(file_path, chunk_size, file_report=None, top_n=None, leaders_by='FinalsTime'):
+    """Aggregate a standardized file read chunk_size rows at a time.
+
+    Each chunk is reduced to sums per group, which are merged into the running
+    sums, so memory is bounded by the chunk size and the number of swimmers
+    rather than by the size of the file. The result is the same as reading the
+    whole file and calling aggregate_data. With top_n, the event leader
+    candidates are kept the same way (see rollups.event_leaders).
+    Returns the aggregated data and the leaders (None without top_n), or
+    (None, None) if the file cannot be used.
+    """
+    try:
+        logger.info(f"Processing file in chunks of {chunk_size} rows: {file_path}")
+        with report.stage(file_report, 'aggregate') as stage:
+            skipped = stage.setdefault('skipped', {})
+            sums = None
+            leaders = None
+            rows_in = 0
+            relays = 0
+            for chunk in formats.read_standardized(file_path, chunksize=chunk_size):
+                chunk = prepare_data(chunk, file_path, skipped=skipped)
+                if chunk is None:
+                    return None, None
+                rows_in += len(chunk)
+                individual_df = individual_results(chunk)
+                relays += len(chunk) - len(individual_df)
+                chunk_sums = group_sums(individual_df)
+                # Swimmers seen in several chunks are merged by summing their sums again
+                sums = chunk_sums if sums is None else group_sums(pd.concat([sums, chunk_sums], ignore_index=True))
+                if top_n:
+                    chunk_leaders = rollups.event_leaders(chunk, top_n, leaders_by)
+                    leaders = chunk_leaders if leaders is None else rollups.event_leaders(
+                        pd.concat([leaders, chunk_leaders], ignore_index=True), top_n, leaders_by)
+            if sums is None:
+                logger.error(f"No rows in {file_path}")
+                return None, None
+            aggregated_df = finish_aggregated(sums)
+            report.count_rows(stage, rows_in=rows_in, rows_out=len(aggregated_df))
+            report.count_skipped(skipped, {'relay': relays})
+        return aggregated_df, leaders
+    except Exception as e:
+        logger.error(f"Error processing file {file_path}: {e}")
+        return None, None
+
+# Function to build the aggregated file name for a standardized file
+def aggregated_filename(file_path, output_format='csv'):
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return f"{stem.replace('standardized_', 'aggregated_')}{formats.EXTENSIONS[output_format]}"
+
+# Function to aggregate prepared standardized data and save the result
+def save_aggregated(df, input_filename, output_dir, file_report=None, output_format='csv', background=False, top_n=None, leaders_by='FinalsTime'):
+    # With background, the output is written on the writer thread (see formats.write_frame)
+    # With top_n, the team, standings and event leader rollups are written too (see rollups.py)
+    # Aggregate data
+    with report.stage(file_report, 'aggregate') as stage:
+        aggregated_df = aggregate_data(df)
+        leaders = rollups.event_leaders(df, top_n, leaders_by) if top_n else None
+        report.count_rows(stage, rows_in=len(df), rows_out=len(aggregated_df))
+        report.count_skipped(stage.setdefault('skipped', {}), {'relay': df['Event'].str.contains('Relay', na=False).sum()})
+    return write_aggregated(aggregated_df, input_filename, output_dir, file_report, output_format, background, leaders, top_n, leaders_by)
+
+# Function to save aggregated data (and, with leaders, its rollups)
+def write_aggregated(aggregated_df, input_filename, output_dir, file_report=None, output_format='csv', background=False,
+                     leaders=None, top_n=None, leaders_by='FinalsTime'):
+    if leaders is not None:
+        write_rollups(aggregated_df, leaders, input_filename, output_dir, top_n, leaders_by, file_report, output_format, background)
+
+    # Generate output filename based on input filename
+    output_filename = aggregated_filename(input_filename, output_format)
+    output_file = os.path.join(output_dir, output_filename)
+    
+    # Save the output
+    with report.stage(file_report, 'write_aggregated') as stage:
+        formats.write_frame(aggregated_df, output_file, output_format, background=background)
+        report.count_rows(stage, rows_in=len(aggregated_df))
+    report.record_output(file_report, 'aggregated', output_file, 'write_aggregated')
+    logger.info(f"Aggregated data {'queued for' if background else 'saved to'} {output_file}")
     
-    return aggregated
+    # Preview the first few rows
+    logger.info(f"Preview of aggregated data for {input_filename}:")
+    logger.info(aggregated_df.head().to_string())
+    return output_file
+
+# Function to build and save the rollups of a meet
+def write_rollups(aggregated_df, leaders, input_filename, output_dir, top_n, leaders_by='FinalsTime', file_report=None, output_format='csv',
+                  background=False):
+    with report.stage(file_report, 'rollups') as stage:
+        frames = rollups.build_rollups(aggregated_df, leaders, top_n, leaders_by)
+        for rollup, rollup_df in frames.items():
+            output_file = os.path.join(output_dir, rollups.rollup_filename(input_filename, rollup, output_format))
+            formats.write_frame(rollup_df, output_file, output_format, background=background)
+            report.record_output(file_report, rollup, output_file, 'rollups')
+        report.count_rows(stage, rows_out=sum(len(rollup_df) for rollup_df in frames.values()))
+    logger.info(f"Rollups ({', '.join(frames)}) {'queued' if background else 'saved'} for {input_filename}")
+
+# Function to aggregate a single standardized file and save the result
+def aggregate_file(file_path, output_dir, file_report=None, output_format='csv', background=False, chunk_size=None, top_n=None,
+                   leaders_by='FinalsTime'):
+    # With chunk_size, the file is read and aggregated that many rows at a time (see aggregate_chunks)
+    if chunk_size:
+        aggregated_df, leaders = aggregate_chunks(file_path, chunk_size, file_report, top_n, leaders_by)
+        if aggregated_df is None:
+            logger.error(f"Skipping aggregation for {os.path.basename(file_path)} due to processing errors")
+            return None
+        return write_aggregated(aggregated_df, os.path.basename(file_path), output_dir, file_report, output_format, background,
+                                leaders, top_n, leaders_by)
+
+    df, input_filename = process_file(file_path, file_report)
+    
+    if df is None:
+        logger.error(f"Skipping aggregation for {os.path.basename(file_path)} due to processing errors")
+        return None
+
+    return save_aggregated(df, input_filename, output_dir, file_report, output_format, background, top_n, leaders_by)
 
 # Main function
 def main(args):
     input_dir = args.input_dir
     output_dir = args.output_dir
+    workers = getattr(args, 'workers', 1)
+    season_state = getattr(args, 'season_state', None)
+    output_format = getattr(args, 'output_format', 'csv')
+    chunk_size = getattr(args, 'chunk_size', None)
+    top_n = getattr(args, 'top_n', 3) if getattr(args, 'rollups', False) else None
+    leaders_by = getattr(args, 'leaders_by', 'FinalsTime')
+    try:
+        formats.check_format(output_format)
+    except ValueError as e:
+        logger.error(f"{e}. Exiting.")
+        return []
+    # Without worker processes, each file is written in the background while the next one is read
+    background = workers <= 1
     
     # Create output directory if it doesn't exist
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
         logger.info(f"Created output directory: {output_dir}")
     
-    # Process all CSV files in the input directory
-    csv_files = [f for f in os.listdir(input_dir) if f.endswith('.csv')]
-    if not csv_files:
-        logger.warning(f"No CSV files found in {input_dir}")
-        return
+    # Process all standardized files in the input directory
+    input_files = sorted(f for f in os.listdir(input_dir) if formats.format_of(f))
+    if not input_files:
+        logger.warning(f"No standardized files found in {input_dir}")
+        return []
     
-    for file_name in csv_files:
-        file_path = os.path.join(input_dir, file_name)
-        df, input_filename = process_file(file_path)
-        
-        if df is not None:
-            # Aggregate data
-            aggregated_df = aggregate_data(df)
-            
-            # Generate output filename based on input filename
-            output_filename = input_filename.replace('standardized_', 'aggregated_')
-            output_file = os.path.join(output_dir, output_filename)
-            
-            # Save to CSV
-            aggregated_df.to_csv(output_file, index=False)
-            logger.info(f"Aggregated data saved to {output_file}")
-            
-            # Preview the first few rows
-            logger.info(f"Preview of aggregated data for {input_filename}:")
-            logger.info(aggregated_df.head().to_string())
-        else:
-            logger.error(f"Skipping aggregation for {file_name} due to processing errors")
+    options = dict(output_format=output_format, background=background, chunk_size=chunk_size, top_n=top_n, leaders_by=leaders_by)
+    tasks = [functools.partial(aggregate_file, os.path.join(input_dir, file_name), output_dir, **options) for file_name in input_files]
+    outcomes = batch.run_batch(tasks, workers)
+    failed_writes = formats.wait_for_writes()
+
+    # Collect results and errors per file
+    results = []
+    for file_name, (output_file, error) in zip(input_files, outcomes):
+        if error is not None:
+            logger.error(f"Error aggregating file {file_name}: {error}")
+        results.append((file_name, output_file if output_file not in failed_writes else None))
+    failed = [file_name for file_name, output_file in results if output_file is None]
+    if failed:
+        logger.error(f"Aggregation failed for {len(failed)} of {len(results)} files: {', '.join(failed)}")
+
+    # Fold the aggregated meets into the season totals
+    if season_state:
+        aggregated_files = [output_file for file_name, output_file in results if output_file]
+        season.update_season(season_state, aggregated_files, os.path.join(output_dir, SEASON_FILENAME))
+    return results
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Aggregate standardized swim meet result CSV files")
-    parser.add_argument('--input-dir', required=True, help='Directory containing standardized CSV files')
-    parser.add_argument('--output-dir', required=True, help='Directory to save aggregated CSV files')
+    parser = argparse.ArgumentParser(description="Aggregate standardized swim meet result files")
+    parser.add_argument('--input-dir', required=True, help='Directory containing standardized files (CSV, Parquet, Feather or JSONL)')
+    parser.add_argument('--output-dir', required=True, help='Directory to save aggregated files')
+    parser.add_argument('--output-format', choices=formats.OUTPUT_FORMATS, default='csv', help='Format of the aggregated files (parquet and feather need pyarrow)')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes used to process files in parallel')
+    parser.add_argument('--chunk-size', type=int, help='Read each standardized file this many rows at a time and merge the partial sums, keeping memory bounded for very large files (CSV, JSONL and Parquet)')
+    parser.add_argument('--rollups', action='store_true', help='Also write team totals, Gender/AgeGroup standings and event leaderboards for each meet')
+    parser.add_argument('--top-n', type=int, default=3, help='Swimmers per Gender/AgeGroup standing and per event leaderboard with --rollups')
+    parser.add_argument('--leaders-by', choices=rollups.LEADER_RANKINGS, default='FinalsTime', help='Rank event leaderboards by fastest FinalsTime or highest TotalPoints')
+    parser.add_argument('--season-state', help='Season state file; each aggregated meet is added to per-swimmer season totals written to season_results.csv')
     args = parser.parse_args()
     main(args)
\ No newline at end of file
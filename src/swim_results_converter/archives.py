@@ -0,0 +1,109 @@
+import io
+import logging
+import os
+import posixpath
+import tarfile
+import zipfile
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Workbook extensions picked up from an input directory or archive
+WORKBOOK_EXTENSIONS = ('.xls', '.xlsx')
+
+# Archives opened in this process: (process id, size and modification time, archive, members by normalized name)
+_open_archives = {}
+
+# Function to check whether a path is a zip or tar archive (rather than a directory)
+def is_archive(path):
+    if not path or not os.path.isfile(path):
+        return False
+    return zipfile.is_zipfile(path) or tarfile.is_tarfile(path)
+
+# Function to check whether a file name is an input workbook (Excel lock and macOS resource files are skipped)
+def is_workbook(file_name):
+    base_name = os.path.basename(file_name)
+    return base_name.endswith(WORKBOOK_EXTENSIONS) and not base_name.startswith(('~$', '.'))
+
+# Function to open an archive once per process (reopened if the file has changed)
+def _open_archive(archive_path):
+    stat = os.stat(archive_path)
+    # Worker processes forked from this one must not share its open file (and file position)
+    signature = (os.getpid(), stat.st_size, stat.st_mtime_ns)
+    cached = _open_archives.get(archive_path)
+    if cached is not None and cached[0] == signature:
+        return cached[1], cached[2]
+    if cached is not None and cached[0][0] == os.getpid():
+        cached[1].close()
+    if zipfile.is_zipfile(archive_path):
+        archive = zipfile.ZipFile(archive_path)
+        members = {posixpath.normpath(info.filename): info for info in archive.infolist() if not info.is_dir()}
+    else:
+        archive = tarfile.open(archive_path, 'r:*')
+        # Tar members are often stored as "./name"
+        members = {posixpath.normpath(member.name): member for member in archive.getmembers() if member.isfile()}
+    _open_archives[archive_path] = (signature, archive, members)
+    return archive, members
+
+# Function to list the input workbooks of a directory or archive
+def list_workbooks(input_path):
+    """Return the sorted names of the workbooks in a directory or a zip/tar archive.
+
+    Archive members are named by their path inside the archive, so
+    os.path.join(input_path, name) addresses them like files on disk (see
+    open_input). Outputs are named after the member's file name without
+    extension, so only the first of several members with the same name is used.
+    """
+    if not is_archive(input_path):
+        return sorted(f for f in os.listdir(input_path) if is_workbook(f))
+
+    members = _open_archive(input_path)[1]
+    names = []
+    seen = {}
+    for name in sorted(members):
+        if name.startswith('__MACOSX/') or not is_workbook(name):
+            continue
+        stem = os.path.splitext(posixpath.basename(name))[0]
+        if stem in seen:
+            logger.warning(f"Skipping {name} in {input_path}: same file name as {seen[stem]}")
+            continue
+        seen[stem] = name
+        names.append(name)
+    return names
+
+# Function to split an archive member path into the archive and the member name (None if the path is on disk)
+def split_member_path(file_path):
+    if os.path.exists(file_path):
+        return None
+    parent = file_path
+    while True:
+        parent = os.path.dirname(parent)
+        if not parent or parent == os.path.dirname(parent):
+            return None
+        if os.path.isfile(parent):
+            if not is_archive(parent):
+                return None
+            return parent, os.path.relpath(file_path, parent).replace(os.sep, '/')
+
+# Function to read an archive member into memory
+def read_member(archive_path, member):
+    archive, members = _open_archive(archive_path)
+    info = members.get(posixpath.normpath(member))
+    if info is None:
+        raise FileNotFoundError(f"{member} is not a file in {archive_path}")
+    if isinstance(archive, zipfile.ZipFile):
+        return archive.read(info)
+    return archive.extractfile(info).read()
+
+# Function to open an input file, on disk or inside an archive, for binary reading
+def open_input(file_path):
+    member_path = split_member_path(file_path)
+    if member_path is None:
+        return open(file_path, 'rb')
+    return io.BytesIO(read_member(*member_path))
+
+# Function to get what the workbook readers should open: the path on disk, or the archive member's bytes
+def workbook_source(file_path):
+    if split_member_path(file_path) is None:
+        return file_path
+    return open_input(file_path)
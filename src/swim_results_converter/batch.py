@@ -0,0 +1,34 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Function to run one task per file, optionally across a process pool
+def run_batch(tasks, workers=1):
+    """Call every task and collect the outcome of each one.
+
+    Each task is a functools.partial of a module-level function with its
+    options given by keyword, e.g. partial(run_file, path, engine='rowwise'),
+    so it can be sent to a worker process. Returns a list of (result, error)
+    tuples in the same order as tasks, so a failing file never stops the rest
+    of the batch.
+    """
+    outcomes = []
+    if not workers or workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            try:
+                outcomes.append((task(), None))
+            except Exception as e:
+                outcomes.append((None, e))
+        return outcomes
+
+    logger.info(f"Processing {len(tasks)} files with {workers} workers")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(task) for task in tasks]
+        for future in futures:
+            try:
+                outcomes.append((future.result(), None))
+            except Exception as e:
+                outcomes.append((None, e))
+    return outcomes
@@ -0,0 +1,154 @@
+import argparse
+import csv
+import logging
+import os
+import re
+import sqlite3
+import sys
+
+import pandas as pd
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Columns identifying a swim for personal bests
+KEY_COLUMNS = ['SwimmerName', 'Distance', 'Stroke', 'Course']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS best_times (
+    SwimmerName TEXT NOT NULL,
+    Distance TEXT NOT NULL,
+    Stroke TEXT NOT NULL,
+    Course TEXT NOT NULL,
+    MeetOrder TEXT NOT NULL,
+    MeetKey TEXT NOT NULL,
+    BestTime REAL NOT NULL,
+    PRIMARY KEY (SwimmerName, Distance, Stroke, Course, MeetOrder, MeetKey)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS best_times_meet ON best_times (MeetKey);
+"""
+
+# Function to open (and if needed create) a best-times index
+def connect(db_file, timeout=30.0):
+    connection = sqlite3.connect(db_file, timeout=timeout)
+    connection.executescript(SCHEMA)
+    return connection
+
+# Function to build the key that orders meets in the index
+def meet_order(file_path):
+    """Order meets by file name, with numbers compared by value ("2025-meet2" before "2025-meet10").
+
+    Meet dates are not used, as they are often only the year of the meet.
+    """
+    stem = os.path.splitext(os.path.basename(file_path))[0].lower()
+    return re.sub(r'\d+', lambda match: match.group().zfill(10), stem)
+
+# Function to build the key columns of swims (None where a swim has no usable key)
+def swim_keys(swims):
+    keys = pd.DataFrame(index=swims.index)
+    for column in KEY_COLUMNS:
+        values = swims[column].astype(object) if column in swims.columns else pd.Series(None, index=swims.index, dtype=object)
+        keys[column] = values.map(lambda value: str(value).strip(), na_action='ignore')
+    # The course is optional in event names
+    keys['Course'] = keys['Course'].fillna('')
+    return keys
+
+# Function to look up the best time of each swim before a meet, in one query
+def previous_bests(db_file, keys, order):
+    """Return the best earlier time of each row of keys (NaN when there is none).
+
+    keys holds the KEY_COLUMNS of the swims (see swim_keys). Only meets that
+    come before order are used, so re-processing a meet never compares it with
+    itself. The distinct keys are looked up together through the primary key.
+    """
+    valid = keys.notna().all(axis=1)
+    distinct = keys[valid].drop_duplicates()
+    if distinct.empty:
+        return pd.Series(float('nan'), index=keys.index)
+    connection = connect(db_file)
+    try:
+        connection.execute('CREATE TEMP TABLE swims (SwimmerName TEXT, Distance TEXT, Stroke TEXT, Course TEXT)')
+        connection.executemany('INSERT INTO temp.swims VALUES (?, ?, ?, ?)', distinct.itertuples(index=False, name=None))
+        rows = connection.execute(
+            'SELECT s.SwimmerName, s.Distance, s.Stroke, s.Course, MIN(b.BestTime) FROM temp.swims s '
+            'JOIN best_times b ON b.SwimmerName = s.SwimmerName AND b.Distance = s.Distance '
+            'AND b.Stroke = s.Stroke AND b.Course = s.Course AND b.MeetOrder < ? '
+            'GROUP BY s.SwimmerName, s.Distance, s.Stroke, s.Course',
+            (order,),
+        ).fetchall()
+    finally:
+        connection.close()
+    found = pd.DataFrame(rows, columns=KEY_COLUMNS + ['BestTime'])
+    merged = keys.merge(found, how='left', on=KEY_COLUMNS)
+    return merged['BestTime'].astype(float).set_axis(keys.index)
+
+# Function to record a meet's best times in the index
+def record_times(db_file, meet_key, order, keys, finals_times, replace=True):
+    """Store the best time per key swum at a meet.
+
+    keys holds the KEY_COLUMNS of the swims and finals_times their times in
+    seconds; swims without a key or a time should already be left out. With
+    replace, the meet's earlier times are removed first (a re-imported meet);
+    otherwise the times are merged with those already stored for the meet
+    (the next chunk of a streamed meet).
+    """
+    swims = keys.assign(BestTime=pd.to_numeric(finals_times, errors='coerce'))
+    swims = swims.dropna()
+    bests = swims.groupby(KEY_COLUMNS, sort=False)['BestTime'].min().reset_index()
+    connection = connect(db_file)
+    try:
+        with connection:
+            if replace:
+                connection.execute('DELETE FROM best_times WHERE MeetKey = ?', (meet_key,))
+            connection.executemany(
+                'INSERT INTO best_times (SwimmerName, Distance, Stroke, Course, MeetOrder, MeetKey, BestTime) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (SwimmerName, Distance, Stroke, Course, MeetOrder, MeetKey) DO UPDATE SET BestTime = MIN(BestTime, excluded.BestTime)',
+                [(*key, order, meet_key, float(best)) for *key, best in bests.itertuples(index=False, name=None)],
+            )
+    finally:
+        connection.close()
+    logger.info(f"Recorded {len(bests)} best times from {meet_key} in {db_file}")
+    return len(bests)
+
+# Function to list the meets in the index
+def recorded_meets(db_file):
+    if not os.path.exists(db_file):
+        return set()
+    connection = connect(db_file)
+    try:
+        return {row[0] for row in connection.execute('SELECT DISTINCT MeetKey FROM best_times')}
+    finally:
+        connection.close()
+
+# Function to list the personal bests of a swimmer
+def swimmer_bests(db_file, swimmer_name):
+    connection = connect(db_file)
+    try:
+        cursor = connection.execute(
+            'SELECT Distance, Stroke, Course, MIN(BestTime) AS BestTime, COUNT(*) AS Meets FROM best_times '
+            'WHERE SwimmerName = ? GROUP BY Distance, Stroke, Course ORDER BY Stroke, CAST(Distance AS INTEGER), Course',
+            (swimmer_name,),
+        )
+        return [column[0] for column in cursor.description], cursor.fetchall()
+    finally:
+        connection.close()
+
+# Main function
+def main(args):
+    if not os.path.exists(args.best_times):
+        logger.error(f"Best-times index not found: {args.best_times}")
+        sys.exit(1)
+    columns, rows = swimmer_bests(args.best_times, args.swimmer)
+    writer = csv.writer(sys.stdout)
+    writer.writerow(columns)
+    writer.writerows(rows)
+    return rows
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="List a swimmer's personal bests from a best-times index (output is CSV)")
+    parser.add_argument('--best-times', required=True, help='Best-times index written by swim-results-converter --best-times')
+    parser.add_argument('swimmer', help='Swimmer name as in the results, e.g. "Brown, Aroha D"')
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,135 @@
+import json
+import logging
+import re
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Registries of event name patterns (name -> regex). Entries are tried in registration order.
+GENDER_PATTERNS = {
+    'Girls': r'Girls',
+    'Boys': r'Boys',
+    'Mixed': r'Mixed',
+    'Men': r'Men',
+    'Women': r'Women',
+}
+COURSE_PATTERNS = {
+    'SCM': r'SC\s*Meter',
+    'LCM': r'LC\s*Meter',
+    'SCY': r'(?:SC\s*)?Yards?',
+}
+STROKE_PATTERNS = {
+    'Freestyle': r'Freestyle',
+    'Butterfly': r'Butterfly',
+    'Medley Relay': r'Medley Relay',
+    'Backstroke': r'Backstroke',
+    'Breaststroke': r'Breaststroke',
+    'IM': r'IM',
+    'Freestyle Relay': r'Freestyle\s*Relay',
+}
+AGE_GROUP_PATTERN = r'\d+-\d+\s*|\d+\s*(?:&\s*Under|Year\s*Olds|\d+\s*&\s*Over)?'
+PARA_CLASS_PATTERN = r'S[BM]?\d{1,2}|Multi-?Class'
+
+# Age group used when an event name does not include one
+DEFAULT_AGE_GROUP = '12 & Over'
+
+# Compiled event pattern and parsed results per distinct event name
+_event_regex = None
+_parsed_events = {}
+
+# Function to drop the compiled pattern and cached results after a registry change
+def _reset():
+    global _event_regex
+    _event_regex = None
+    _parsed_events.clear()
+
+# Function to build a regex alternation with one named group per registry entry
+def _alternation(prefix, patterns):
+    return '|'.join(f'(?P<{prefix}{i}>{pattern})' for i, pattern in enumerate(patterns.values()))
+
+# Function to compile the event pattern from the registries (once per registry change)
+def _compiled_event_regex():
+    global _event_regex
+    if _event_regex is None:
+        pattern = (
+            rf'(?:{_alternation("gender", GENDER_PATTERNS)})\s*'
+            rf'(?P<age_group>{AGE_GROUP_PATTERN})?\s*'
+            # The word boundary stops an age group from splitting the distance (e.g. "Women 100")
+            rf'(?P<distance>\b\d+)\s*'
+            rf'(?:{_alternation("course", COURSE_PATTERNS)})\s*'
+            rf'(?:{_alternation("stroke", STROKE_PATTERNS)})'
+            rf'(?:\s*(?P<para_class>{PARA_CLASS_PATTERN}))?'
+        )
+        _event_regex = re.compile(pattern)
+    return _event_regex
+
+# Function to find which registry entry matched
+def _matched_name(match, prefix, patterns):
+    for i, name in enumerate(patterns):
+        if match.group(f'{prefix}{i}') is not None:
+            return name
+    return None
+
+# Function to register a gender pattern
+def register_gender(name, pattern=None):
+    GENDER_PATTERNS[name] = pattern or re.escape(name)
+    _reset()
+
+# Function to register a course pattern (e.g., "LCM" -> r"LC\s*Meter")
+def register_course(code, pattern):
+    COURSE_PATTERNS[code] = pattern
+    _reset()
+
+# Function to register a stroke pattern
+def register_stroke(name, pattern=None):
+    STROKE_PATTERNS[name] = pattern or re.escape(name)
+    _reset()
+
+# Function to load additional patterns from a JSON file
+def load_event_patterns(file_path):
+    """Register the patterns in a JSON file.
+
+    The file may contain "genders", "courses" and "strokes" objects mapping a
+    name to a regex, e.g. {"strokes": {"Individual Medley": "Ind\\\\.? Medley"}}.
+    Loading the same file again is harmless.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        patterns = json.load(f)
+    for name, pattern in patterns.get('genders', {}).items():
+        register_gender(name, pattern)
+    for code, pattern in patterns.get('courses', {}).items():
+        register_course(code, pattern)
+    for name, pattern in patterns.get('strokes', {}).items():
+        register_stroke(name, pattern)
+    logger.info(f"Loaded event patterns from {file_path}")
+
+# Function to extract event details from event name
+def parse_event_name(event_name):
+    """Parse an event name, caching the result per distinct name."""
+    details = _parsed_events.get(event_name)
+    if details is None:
+        details = _parse_event_name(event_name)
+        _parsed_events[event_name] = details
+    return dict(details)
+
+# Function to parse an event name with the compiled pattern
+def _parse_event_name(event_name):
+    match = _compiled_event_regex().search(event_name.strip())
+    if match:
+        return {
+            'Gender': _matched_name(match, 'gender', GENDER_PATTERNS),
+            'AgeGroup': match.group('age_group') if match.group('age_group') else DEFAULT_AGE_GROUP,
+            'Distance': match.group('distance'),
+            'Stroke': _matched_name(match, 'stroke', STROKE_PATTERNS),
+            'Course': _matched_name(match, 'course', COURSE_PATTERNS),
+            'ParaClass': match.group('para_class'),
+        }
+    logger.warning(f"Could not parse event name: {event_name}")
+    return {
+        'Gender': None,
+        'AgeGroup': None,
+        'Distance': None,
+        'Stroke': None,
+        'Course': None,
+        'ParaClass': None,
+    }
@@ -0,0 +1,157 @@
+import importlib.util
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+try:
+    from . import schema
+except ImportError:
+    import schema
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Supported output formats and their file extensions
+OUTPUT_FORMATS = ('csv', 'parquet', 'feather', 'jsonl')
+EXTENSIONS = {
+    'csv': '.csv',
+    'parquet': '.parquet',
+    'feather': '.feather',
+    'jsonl': '.jsonl',
+}
+
+# Formats that can be written one chunk at a time (used when streaming)
+APPENDABLE_FORMATS = ('csv', 'jsonl')
+
+# Background writer thread and the writes it has not finished yet
+_writer = None
+_pending = []
+
+# Function to check that an output format can be written here
+def check_format(output_format):
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format}")
+    if output_format in ('parquet', 'feather') and importlib.util.find_spec('pyarrow') is None:
+        raise ValueError(f"{output_format.capitalize()} output needs pyarrow (pip install pyarrow)")
+
+# Function to find the format of a file from its extension (None if it is not a supported format)
+def format_of(file_path):
+    extension = os.path.splitext(file_path)[1].lower()
+    for output_format, format_extension in EXTENSIONS.items():
+        if extension == format_extension:
+            return output_format
+    return None
+
+# Function to prepare a frame for JSON (float32 values rounded, so 65.43 is not written as 65.4300003)
+def json_ready(df):
+    float32_columns = [column for column in df.columns if df[column].dtype == 'float32']
+    if not float32_columns:
+        return df
+    return df.assign(**{column: df[column].astype('float64').round(4) for column in float32_columns})
+
+# Function to write a frame in one of the output formats
+def _write(df, output_file, output_format, standardized=False, append=False):
+    if output_format == 'csv':
+        if standardized:
+            schema.write_csv(df, output_file, mode='a' if append else 'w', header=not append)
+        else:
+            df.to_csv(output_file, index=False, mode='a' if append else 'w', header=not append)
+    elif output_format == 'jsonl':
+        with open(output_file, 'a' if append else 'w', encoding='utf-8') as f:
+            if len(df):
+                f.write(json_ready(df).to_json(orient='records', lines=True, force_ascii=False))
+                f.write('\n')
+    elif output_format == 'parquet':
+        df.to_parquet(output_file, index=False)
+    elif output_format == 'feather':
+        df.reset_index(drop=True).to_feather(output_file)
+    else:
+        raise ValueError(f"Unknown output format: {output_format}")
+
+# Function to write a frame on the background writer thread and return the seconds the write took
+def _timed_write(df, output_file, output_format, standardized=False, append=False):
+    start = time.perf_counter()
+    _write(df, output_file, output_format, standardized, append)
+    return time.perf_counter() - start
+
+# Function to write a frame, optionally on the background writer thread
+def write_frame(df, output_file, output_format='csv', standardized=False, append=False, background=False):
+    """Write df to output_file in output_format.
+
+    Standardized frames keep the original CSV layout (see schema.write_csv).
+    With background, the write is queued on a writer thread and this returns
+    at once, so the next file can be read while this one is written; call
+    wait_for_writes before using the files.
+    """
+    global _writer
+    if not background:
+        _write(df, output_file, output_format, standardized, append)
+        return output_file
+    if _writer is None:
+        _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='output-writer')
+    _pending.append((output_file, _writer.submit(_timed_write, df, output_file, output_format, standardized, append)))
+    return output_file
+
+# Function to wait for the background writes and return the files that could not be written
+def wait_for_writes(write_seconds=None):
+    # write_seconds (a dict) gets the time each written file took on the writer thread
+    failed = {}
+    while _pending:
+        output_file, future = _pending.pop(0)
+        try:
+            seconds = future.result()
+            if write_seconds is not None:
+                write_seconds[output_file] = write_seconds.get(output_file, 0.0) + seconds
+        except Exception as e:
+            logger.error(f"Error writing {output_file}: {e}")
+            failed[output_file] = e
+    return failed
+
+# Function to read a standardized file in any supported format into the standardized schema
+def read_standardized(file_path, chunksize=None):
+    """Read a standardized file (CSV, Parquet, Feather or JSONL) with the standardized dtypes.
+
+    With chunksize, returns an iterator of DataFrames (Parquet is read by row
+    group batches, Feather is returned as a single chunk).
+    """
+    input_format = format_of(file_path)
+    if input_format == 'csv':
+        return schema.read_standardized_csv(file_path, chunksize=chunksize)
+    if input_format == 'jsonl':
+        if chunksize:
+            return (_standardized_json(chunk) for chunk in pd.read_json(file_path, lines=True, dtype=False, chunksize=chunksize))
+        return _standardized_json(pd.read_json(file_path, lines=True, dtype=False))
+    if input_format == 'parquet':
+        if chunksize:
+            import pyarrow.parquet as pq
+            batches = pq.ParquetFile(file_path).iter_batches(batch_size=chunksize)
+            return (schema.standardized(batch.to_pandas()) for batch in batches)
+        df = schema.standardized(pd.read_parquet(file_path))
+    elif input_format == 'feather':
+        df = schema.standardized(pd.read_feather(file_path))
+    else:
+        raise ValueError(f"Unsupported input file: {file_path}")
+    return [df] if chunksize else df
+
+# Function to cast a frame read from JSON lines to the standardized schema
+def _standardized_json(df):
+    for column in schema.STANDARDIZED_TEXT:
+        if column in df.columns:
+            df[column] = df[column].astype(object).where(df[column].notna()).map(str, na_action='ignore')
+    return schema.standardized(df)
+
+# Function to read an aggregated file in any supported format
+def read_aggregated(file_path):
+    input_format = format_of(file_path)
+    if input_format == 'csv':
+        return pd.read_csv(file_path)
+    if input_format == 'jsonl':
+        return pd.read_json(file_path, lines=True, dtype=False)
+    if input_format == 'parquet':
+        return pd.read_parquet(file_path)
+    if input_format == 'feather':
+        return pd.read_feather(file_path)
+    raise ValueError(f"Unsupported input file: {file_path}")
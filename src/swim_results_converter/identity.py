@@ -0,0 +1,220 @@
+import hashlib
+import logging
+import re
+import sqlite3
+import unicodedata
+from datetime import datetime
+from difflib import SequenceMatcher
+
+import pandas as pd
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Lowest similarity of surnames and first names for a fuzzy match within a block
+MATCH_RATIO = 0.8
+
+# Largest difference of the birth years (meet year minus age) of a fuzzy match
+BIRTH_YEAR_TOLERANCE = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS identities (
+    Block TEXT NOT NULL,
+    NameKey TEXT NOT NULL,
+    SwimmerID TEXT NOT NULL,
+    SwimmerName TEXT NOT NULL,
+    FirstSeen TEXT NOT NULL,
+    BirthYear INTEGER,
+    PRIMARY KEY (Block, NameKey)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS identities_swimmer ON identities (SwimmerID);
+"""
+
+# Soundex codes of the consonants (vowels, h, w and y have none)
+SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'), **dict.fromkeys('cgjkqsxz', '2'), **dict.fromkeys('dt', '3'),
+    'l': '4', **dict.fromkeys('mn', '5'), 'r': '6',
+}
+
+# Function to fold text for comparison (accents, case, punctuation and extra whitespace removed)
+def fold(text):
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(char for char in text if not unicodedata.combining(char)).casefold()
+    return ' '.join(re.sub(r"[^\w\s]|_", ' ', text.replace("'", '')).split())
+
+# Function to build the normalized name key of a swimmer ("Smith, Jane" and "Jane Smith" give "smith|jane")
+def name_key(name):
+    name = str(name)
+    if ',' in name:
+        surname, given = name.split(',', 1)
+    else:
+        parts = name.split()
+        surname, given = (parts[-1], ' '.join(parts[:-1])) if parts else ('', '')
+    return f"{fold(surname)}|{fold(given)}"
+
+# Function to compute the Soundex code of a word (e.g. "Smith" and "Smyth" give "S530")
+def soundex(word):
+    letters = [char for char in fold(word) if char.isalpha()]
+    if not letters:
+        return ''
+    code = letters[0].upper()
+    previous = SOUNDEX_CODES.get(letters[0], '')
+    for char in letters[1:]:
+        digit = SOUNDEX_CODES.get(char, '')
+        if digit and digit != previous:
+            code += digit
+        if char not in 'hw':
+            previous = digit
+    return (code + '000')[:4]
+
+# Function to build the blocking key of a swimmer (team plus the sound of the surname)
+def block_key(key, team):
+    team = fold(team) if team is not None and not pd.isna(team) else ''
+    return f"{team}|{soundex(key.split('|', 1)[0].replace(' ', ''))}"
+
+# Function to derive the SwimmerID of a name key within a block
+def new_swimmer_id(block, key):
+    return 'S' + hashlib.sha1(f"{block}|{key}".encode('utf-8')).hexdigest()[:10]
+
+# Function to estimate birth years from ages and meet dates (missing where either is unknown)
+def birth_years(ages, dates):
+    ages = pd.to_numeric(pd.Series(ages), errors='coerce')
+    years = pd.to_numeric(pd.Series(dates, index=ages.index).astype(str).str[:4], errors='coerce')
+    return years - ages
+
+# Function to check whether two name keys of the same block are the same swimmer
+def same_swimmer(key_a, key_b, birth_year_a=None, birth_year_b=None):
+    """Compare two name keys of different spellings.
+
+    The surnames and first names must be similar, the middle initials must not
+    conflict and the birth years must be known and close. A first name only
+    matches a longer one it starts with when it is an initial ("Smith, J" and
+    "Smith, Jane"), so "Smith, Max" and "Smith, Maxine" stay apart.
+    """
+    if birth_year_a is None or birth_year_b is None or pd.isna(birth_year_a) or pd.isna(birth_year_b):
+        return False
+    if abs(birth_year_a - birth_year_b) > BIRTH_YEAR_TOLERANCE:
+        return False
+    surname_a, given_a = key_a.split('|', 1)
+    surname_b, given_b = key_b.split('|', 1)
+    given_a, given_b = given_a.split(), given_b.split()
+    if not given_a or not given_b:
+        return False
+    if SequenceMatcher(None, surname_a, surname_b).ratio() < MATCH_RATIO:
+        return False
+    first_a, first_b = given_a[0], given_b[0]
+    if len(first_a) == 1 or len(first_b) == 1:
+        if not (first_a.startswith(first_b) or first_b.startswith(first_a)):
+            return False
+    elif first_a != first_b and (first_a.startswith(first_b) or first_b.startswith(first_a)):
+        # A shorter name inside a longer one ("Jan" and "Jane") is a different name, not a typo
+        return False
+    elif SequenceMatcher(None, first_a, first_b).ratio() < MATCH_RATIO:
+        return False
+    # "Brown, Aroha D" and "Brown, Aroha B" are different swimmers; "Brown, Aroha" may be either
+    if len(given_a) > 1 and len(given_b) > 1 and given_a[1][0] != given_b[1][0]:
+        return False
+    return True
+
+# Function to open (and if needed create) an identity registry
+def connect(db_file, timeout=30.0):
+    connection = sqlite3.connect(db_file, timeout=timeout, isolation_level=None)
+    connection.executescript(SCHEMA)
+    columns = {row[1] for row in connection.execute('PRAGMA table_info(identities)')}
+    if 'BirthYear' not in columns:
+        # Registries from before birth years were kept; their swimmers get one when next seen
+        connection.execute('ALTER TABLE identities ADD COLUMN BirthYear INTEGER')
+    return connection
+
+# Function to resolve distinct (block, name key) pairs against the registry
+def _resolve_registered(db_file, swimmers):
+    """Return a dict of (block, key) to SwimmerID, registering new swimmers.
+
+    Only the registry rows of the blocks in swimmers are read, and a new name
+    is only compared with the swimmers of its own block.
+    """
+    connection = connect(db_file)
+    try:
+        # Hold the write lock while resolving, so parallel workers do not register a swimmer twice
+        connection.execute('BEGIN IMMEDIATE')
+        connection.execute('CREATE TEMP TABLE blocks (Block TEXT PRIMARY KEY)')
+        connection.executemany('INSERT OR IGNORE INTO temp.blocks VALUES (?)', [(block,) for block in swimmers['Block'].unique()])
+        known = {}
+        for block, key, swimmer_id, birth_year in connection.execute(
+            'SELECT i.Block, i.NameKey, i.SwimmerID, i.BirthYear FROM identities i JOIN temp.blocks b ON i.Block = b.Block'
+        ):
+            known.setdefault(block, {})[key] = (swimmer_id, birth_year)
+
+        resolved = {}
+        new_rows = []
+        dated_rows = []
+        now = datetime.now().isoformat(timespec='seconds')
+        for block, key, name, birth_year in swimmers[['Block', 'NameKey', 'SwimmerName', 'BirthYear']].itertuples(index=False, name=None):
+            birth_year = None if pd.isna(birth_year) else int(birth_year)
+            candidates = known.setdefault(block, {})
+            swimmer_id, known_year = candidates.get(key, (None, None))
+            if swimmer_id is None:
+                swimmer_id = next((candidate_id for candidate_key, (candidate_id, candidate_year) in candidates.items()
+                                   if same_swimmer(key, candidate_key, birth_year, candidate_year)), None)
+                if swimmer_id is not None:
+                    logger.info(f"Matched {name} to swimmer {swimmer_id}")
+                else:
+                    swimmer_id = new_swimmer_id(block, key)
+                candidates[key] = (swimmer_id, birth_year)
+                new_rows.append((block, key, swimmer_id, str(name), now, birth_year))
+            elif known_year is None and birth_year is not None:
+                candidates[key] = (swimmer_id, birth_year)
+                dated_rows.append((birth_year, block, key))
+            resolved[(block, key)] = swimmer_id
+        connection.executemany(
+            'INSERT OR IGNORE INTO identities (Block, NameKey, SwimmerID, SwimmerName, FirstSeen, BirthYear) VALUES (?, ?, ?, ?, ?, ?)', new_rows
+        )
+        connection.executemany('UPDATE identities SET BirthYear = ? WHERE Block = ? AND NameKey = ?', dated_rows)
+        connection.execute('COMMIT')
+    except Exception:
+        connection.execute('ROLLBACK')
+        raise
+    finally:
+        connection.close()
+    return resolved
+
+# Function to assign a SwimmerID to each result
+def swimmer_ids(names, teams, relay=None, identities_db=None, birth_years=None):
+    """Return the SwimmerID of each result (missing for relays and rows without a name).
+
+    Names are compared by their normalized key, so spelling variants such as
+    "Smith, Jane", "Jane Smith" and "smith,  jane " get the same ID, computed
+    from the key and the block (team and Soundex of the surname). With
+    identities_db, an identity registry, a new name is also matched with the
+    known swimmers of its block (e.g. "Smyth, Jane" or "Smith, J") born within
+    a year of it (birth_years, see birth_years()), and the IDs stay the same
+    across meets and runs. Work is done once per distinct name and team, and
+    matching only compares names within a block.
+    """
+    names = pd.Series(names).astype(object)
+    teams = pd.Series(teams, index=names.index).astype(object)
+    valid = names.notna()
+    if relay is not None:
+        valid &= ~pd.Series(relay, index=names.index).fillna(False).astype(bool)
+    pairs = pd.DataFrame({'SwimmerName': names[valid], 'Team': teams[valid]}).drop_duplicates()
+    if pairs.empty:
+        return pd.Series(None, index=names.index, dtype=object)
+
+    pairs['NameKey'] = pairs['SwimmerName'].map(name_key)
+    pairs['Block'] = [block_key(key, team) for key, team in zip(pairs['NameKey'], pairs['Team'])]
+    if identities_db:
+        # Most frequent spellings first, so they become the registered names
+        years = pd.Series(birth_years, index=names.index) if birth_years is not None else pd.Series(float('nan'), index=names.index)
+        counts = pd.DataFrame({'SwimmerName': names[valid], 'Team': teams[valid], 'BirthYear': years[valid].astype('float64')}).groupby(
+            ['SwimmerName', 'Team'], dropna=False, sort=False).agg(Count=('BirthYear', 'size'), BirthYear=('BirthYear', 'median')).reset_index()
+        ordered = pairs.merge(counts, how='left', on=['SwimmerName', 'Team']).sort_values(
+            ['Count', 'Block', 'NameKey'], ascending=[False, True, True], kind='stable')
+        resolved = _resolve_registered(identities_db, ordered)
+        pairs['SwimmerID'] = [resolved[(block, key)] for block, key in zip(pairs['Block'], pairs['NameKey'])]
+    else:
+        pairs['SwimmerID'] = [new_swimmer_id(block, key) for block, key in zip(pairs['Block'], pairs['NameKey'])]
+
+    lookup = pd.DataFrame({'SwimmerName': names, 'Team': teams}).merge(
+        pairs[['SwimmerName', 'Team', 'SwimmerID']], how='left', on=['SwimmerName', 'Team']
+    )
+    return lookup['SwimmerID'].where(valid.to_numpy(), None).set_axis(names.index)
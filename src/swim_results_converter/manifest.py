@@ -0,0 +1,77 @@
+import hashlib
+import json
+import logging
+import os
+
+from . import __version__
+from . import archives
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Name of the build manifest kept in the standardized output directory
+MANIFEST_FILENAME = '.swim_results_manifest.json'
+
+# Function to hash the content of an input file (on disk or inside an archive)
+def file_hash(file_path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with archives.open_input(file_path) as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# Function to load the manifest from an output directory
+def load_manifest(output_dir):
+    manifest_path = os.path.join(output_dir, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        return {'files': {}}
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        manifest.setdefault('files', {})
+        return manifest
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable manifest {manifest_path}: {e}")
+        return {'files': {}}
+
+# Function to save the manifest to an output directory
+def save_manifest(output_dir, manifest):
+    manifest_path = os.path.join(output_dir, MANIFEST_FILENAME)
+    temp_path = f"{manifest_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, manifest_path)
+
+# Function to check whether a manifest entry was built from this input with these settings
+def _matches(entry, content_hash, bonus_points, settings=None):
+    # settings holds the other options that change the outputs (only those in use, so older entries still match)
+    return (
+        bool(entry)
+        and entry.get('hash') == content_hash
+        and entry.get('version') == __version__
+        and entry.get('bonus_points') == dict(bonus_points)
+        and entry.get('settings', {}) == dict(settings or {})
+    )
+
+# Function to check whether a manifest entry still describes the current build
+def is_current(entry, content_hash, bonus_points, stage, output_file, settings=None):
+    """Return True if the entry matches the input and settings and still points at an existing stage output."""
+    if not _matches(entry, content_hash, bonus_points, settings):
+        return False
+    return entry.get('outputs', {}).get(stage) == output_file and os.path.exists(output_file)
+
+# Function to record a built stage output for an input file
+def record_output(manifest, file_name, content_hash, bonus_points, stage, output_file, settings=None):
+    entry = manifest['files'].get(file_name)
+    if not _matches(entry, content_hash, bonus_points, settings):
+        # Start a fresh entry so outputs of an older build are not carried over
+        entry = {
+            'hash': content_hash,
+            'version': __version__,
+            'bonus_points': dict(bonus_points),
+            'outputs': {},
+        }
+        if settings:
+            entry['settings'] = dict(settings)
+        manifest['files'][file_name] = entry
+    entry['outputs'][stage] = output_file
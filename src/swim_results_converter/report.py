@@ -0,0 +1,134 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Function to start the report of one input file
+def new_file_report(file_path):
+    return {
+        'file': os.path.basename(file_path),
+        'status': 'ok',
+        'seconds': 0.0,
+        'stages': {},
+        'outputs': {},
+    }
+
+# Function to time one stage of a file (report may be None, in which case nothing is recorded)
+@contextmanager
+def stage(file_report, name):
+    """Time a stage and yield its report dict for row counts.
+
+    Running the same stage again (e.g. once per chunk when streaming) adds to
+    the time and counts already recorded.
+    """
+    stage_report = {'seconds': 0.0}
+    if file_report is not None:
+        stage_report = file_report['stages'].setdefault(name, stage_report)
+    start = time.perf_counter()
+    try:
+        yield stage_report
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_report['seconds'] = round(stage_report['seconds'] + elapsed, 4)
+        if file_report is not None:
+            file_report['seconds'] = round(file_report['seconds'] + elapsed, 4)
+        logger.debug(f"Stage {name} took {elapsed:.3f} s")
+
+# Function to add row counts to a stage report
+def count_rows(stage_report, rows_in=None, rows_out=None):
+    if rows_in is not None:
+        stage_report['rows_in'] = stage_report.get('rows_in', 0) + int(rows_in)
+    if rows_out is not None:
+        stage_report['rows_out'] = stage_report.get('rows_out', 0) + int(rows_out)
+
+# Function to add counts of skipped rows by reason (skipped is a dict, or None to ignore)
+def count_skipped(skipped, reasons):
+    if skipped is None:
+        return
+    for reason, rows in reasons.items():
+        if rows:
+            skipped[reason] = skipped.get(reason, 0) + int(rows)
+
+# Function to record an output file and the bytes written to it
+def record_output(file_report, stage_name, output_file, write_stage=None):
+    # write_stage is the stage that writes the file, which gets the time of a background write
+    if file_report is None or not output_file:
+        return
+    file_report['outputs'][stage_name] = {
+        'path': output_file,
+        'bytes': os.path.getsize(output_file) if os.path.exists(output_file) else 0,
+    }
+    if write_stage:
+        file_report['outputs'][stage_name]['stage'] = write_stage
+
+# Function to update the report once outputs written in the background are complete
+def refresh_outputs(file_report, write_seconds=None):
+    """Update the bytes written and add the background write times.
+
+    write_seconds maps output files to the seconds their write took on the
+    writer thread (see formats.wait_for_writes). The time is added to the
+    stage that queued the write, which otherwise only measured the queueing.
+    """
+    if file_report is None:
+        return
+    for output in file_report['outputs'].values():
+        output['bytes'] = os.path.getsize(output['path']) if os.path.exists(output['path']) else 0
+        seconds = (write_seconds or {}).get(output['path'])
+        stage_report = file_report['stages'].get(output.get('stage'))
+        if seconds is None or stage_report is None:
+            continue
+        stage_report['seconds'] = round(stage_report['seconds'] + seconds, 4)
+        stage_report['background'] = True
+        file_report['seconds'] = round(file_report['seconds'] + seconds, 4)
+
+# Function to start the report of a pipeline run
+def new_run_report(**settings):
+    return {
+        'started': datetime.now().isoformat(timespec='seconds'),
+        'seconds': 0.0,
+        'settings': settings,
+        'files': [],
+    }
+
+# Function to finish and save a run report as JSON
+def save_report(report_file, run_report, started):
+    run_report['seconds'] = round(time.perf_counter() - started, 4)
+    files = run_report['files']
+    run_report['totals'] = {
+        'files': len(files),
+        'processed': sum(1 for f in files if f['status'] == 'ok'),
+        'failed': sum(1 for f in files if f['status'] == 'failed'),
+        'up_to_date': sum(1 for f in files if f['status'] == 'up_to_date'),
+        'bytes_written': sum(output['bytes'] for f in files for output in f['outputs'].values()),
+    }
+    temp_path = f"{report_file}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(run_report, f, indent=2)
+    os.replace(temp_path, report_file)
+    logger.info(f"Run report saved to {report_file}")
+    return report_file
+
+# Function to run a callable under cProfile and save the stats
+def profiled(func, profile_file, *args, **kwargs):
+    """Run func under cProfile, save the stats to profile_file and log the hot spots.
+
+    The saved file can be explored with pstats or snakeviz. Only this process
+    is profiled, so work done in worker processes shows up as waiting time.
+    """
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(profile_file)
+        logger.info(f"Profile saved to {profile_file}")
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(15)
+        logger.info(f"Top functions by cumulative time:\n{summary.getvalue()}")
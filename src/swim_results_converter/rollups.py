@@ -0,0 +1,95 @@
+import logging
+import os
+
+try:
+    from . import formats
+    from . import schema
+except ImportError:
+    import formats
+    import schema
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Rollups written next to each aggregated file (the name is also the file name prefix)
+ROLLUPS = ('teams', 'standings', 'leaders')
+
+# Columns event leaderboards can be ranked by, and whether the highest value comes first
+LEADER_RANKINGS = {'FinalsTime': False, 'TotalPoints': True}
+
+# Group keys of each rollup
+TEAM_KEYS = ['MeetName', 'Date', 'Team']
+STANDING_KEYS = ['MeetName', 'Date', 'Gender', 'AgeGroup']
+LEADER_KEYS = ['MeetName', 'Date', 'Event']
+
+# Columns of the event leaderboards (Place is added once the leaders are final)
+LEADER_COLUMNS = ['MeetName', 'Date', 'Event', 'SwimmerName', 'Age', 'Team', 'FinalsTime', 'TotalPoints', 'SwimmerID']
+
+# Summed team columns
+TEAM_TOTALS = ['PlacePoints', 'TimePoints', 'PBPoints', 'TotalPoints', 'QualificationADVCount', 'QualificationDEVCount']
+
+# Function to build the file name of a rollup for a standardized or aggregated file
+def rollup_filename(file_path, rollup, output_format='csv'):
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    for prefix in ('standardized_', 'aggregated_'):
+        if stem.startswith(prefix):
+            stem = stem[len(prefix):]
+    return f"{rollup}_{stem}{formats.EXTENSIONS[output_format]}"
+
+# Function to pick the top rows of each group
+def select_top(df, keys, column, top_n, largest=True):
+    """Return the top_n rows of each group of keys by column.
+
+    Each group is cut down with a partial selection (nlargest/nsmallest)
+    rather than a full sort. Rows without a value are left out and ties keep
+    the earlier row, so selecting from the selections of several chunks gives
+    the same rows as selecting from the whole data.
+    """
+    df = df.reset_index(drop=True)
+    if df.empty:
+        return df
+    grouped = df.groupby(keys, observed=True)[column]
+    selected = grouped.nlargest(top_n) if largest else grouped.nsmallest(top_n)
+    return df.loc[selected.index.get_level_values(-1)].reset_index(drop=True)
+
+# Function to number the rows of each group by column (tied rows share a place)
+def with_places(df, keys, column, largest=True):
+    df = df.copy()
+    places = df.groupby(keys, observed=True)[column].rank(method='min', ascending=not largest)
+    df.insert(len(keys), 'Place', places.astype('int32'))
+    return df
+
+# Function to select the leader candidates of each event from prepared standardized results
+def event_leaders(df, top_n, leaders_by='FinalsTime'):
+    # DQ swims are left out; swims without a time are dropped by the selection
+    if 'DQ' in df.columns:
+        df = df[~df['DQ'].fillna(False).astype(bool)]
+    leaders = df[LEADER_COLUMNS]
+    if 'ResultPoints' in df.columns:
+        # Rank by the points of each result rather than the whole points summed by the aggregation
+        leaders = leaders.assign(TotalPoints=df['ResultPoints'])
+    return select_top(leaders, LEADER_KEYS, leaders_by, top_n, LEADER_RANKINGS[leaders_by])
+
+# Function to total the aggregated swimmer rows per team
+def team_totals(aggregated_df):
+    teams = aggregated_df.groupby(TEAM_KEYS, observed=True).agg(
+        Swimmers=('SwimmerID', 'nunique'), **{column: (column, 'sum') for column in TEAM_TOTALS}
+    ).reset_index()
+    teams = teams.sort_values(['MeetName', 'Date', 'TotalPoints', 'Team'], ascending=[True, True, False, True], kind='stable')
+    return with_places(teams, ['MeetName', 'Date'], 'TotalPoints')
+
+# Function to build all rollups of a meet
+def build_rollups(aggregated_df, leaders, top_n, leaders_by='FinalsTime'):
+    """Return a dict of rollup name to DataFrame.
+
+    Team totals and the Gender/AgeGroup standings (top_n swimmers by
+    TotalPoints) are rolled up from the aggregated swimmer rows, and the event
+    leaderboards from the leader candidates selected while the standardized
+    data was read (see event_leaders), so the results are only scanned once.
+    """
+    standings = with_places(select_top(aggregated_df, STANDING_KEYS, 'TotalPoints', top_n), STANDING_KEYS, 'TotalPoints')
+    return {
+        'teams': schema.aggregated(team_totals(aggregated_df)),
+        'standings': schema.aggregated(standings),
+        'leaders': schema.standardized(with_places(leaders, LEADER_KEYS, leaders_by, LEADER_RANKINGS[leaders_by])),
+    }
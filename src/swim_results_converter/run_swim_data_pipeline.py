@@ -1,14 +1,34 @@
 import argparse
+import functools
+import json
 import logging
 import os
 import sys
-from . import standardize_swim_data
-from . import aggregate_swim_data
+import time
+from . import manifest
+from . import archives
+from . import batch
+from . import events
+from . import report
+from . import store
+from . import watch
+
+# The standardization, aggregation and season modules import pandas, so they are
+# imported where a stage runs; --help and argument errors stay instant.
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Standardization engines (as standardize_swim_data.ENGINES, listed here to keep startup light)
+ENGINES = ('vectorized', 'rowwise')
+
+# Output formats (as formats.OUTPUT_FORMATS, listed here to keep startup light)
+OUTPUT_FORMATS = ('csv', 'parquet', 'feather', 'jsonl')
+
+# Bonus points used unless other values are given
+DEFAULT_BONUS_POINTS = {"DEV": "3", "ADV": "6", "NT": "1", "PB": "2"}
+
 def validate_directory(path, create_if_missing=True):
     """Validate or create a directory."""
     if not path:
@@ -25,19 +45,173 @@ def validate_directory(path, create_if_missing=True):
         return None
     return os.path.abspath(path)
 
+def validate_input(path):
+    """Validate an input directory or zip/tar archive of workbooks."""
+    if path and archives.is_archive(path):
+        return os.path.abspath(path)
+    return validate_directory(path, create_if_missing=False)
+
+def run_file(file_path, bonus_points, engine, standardized_dir, aggregated_dir, event_patterns=None, chunk_size=None, database=None,
+             output_format='csv', background=False, best_times_db=None, identities_db=None, top_n=None, leaders_by='FinalsTime',
+             segment_workers=1):
+    """Standardize one workbook and aggregate it in memory.
+
+    The standardized file is only written when standardized_dir is given.
+    With chunk_size the workbook is streamed straight to the standardized file,
+    which the aggregation step then reads back. With database the standardized
+    records are also stored in that SQLite database. With background the
+    outputs are written on the writer thread while the caller moves on to the
+    next file; formats.wait_for_writes must be called before they are used.
+    With best_times_db, PB and NT bonuses are checked against that best-times
+    index and the meet is added to it. With identities_db, SwimmerIDs are
+    resolved against that identity registry. With top_n, the team, standings
+    and event leader rollups are written next to the aggregated file. With
+    segment_workers, a large workbook is standardized in event segments across
+    that many processes (not in streaming mode).
+    Returns a dict of the outputs produced, keyed by stage, and the file's
+    report (stage timings, row counts and bytes written).
+    """
+    from . import standardize_swim_data
+    from . import aggregate_swim_data
+    from . import formats
+    if event_patterns:
+        events.load_event_patterns(event_patterns)
+    outputs = {}
+    file_report = report.new_file_report(file_path)
+    if chunk_size:
+        standardized_file = standardize_swim_data.stream_file(file_path, standardized_dir, bonus_points, chunk_size, file_report=file_report,
+                                                              output_format=output_format, best_times_db=best_times_db,
+                                                              identities_db=identities_db)
+        if standardized_file is None:
+            return outputs, file_report
+        outputs['standardized'] = standardized_file
+        if database:
+            # Read the streamed file back in chunks, so memory stays bounded
+            with report.stage(file_report, 'store_database'):
+                store.store_results(database, file_path, manifest.file_hash(file_path), bonus_points,
+                                    formats.read_standardized(standardized_file, chunksize=chunk_size))
+            outputs['database'] = database
+        if aggregated_dir:
+            # Aggregate in chunks too, so memory stays bounded
+            aggregated_file = aggregate_swim_data.aggregate_file(standardized_file, aggregated_dir, file_report, output_format, background,
+                                                                  chunk_size=chunk_size, top_n=top_n, leaders_by=leaders_by)
+            if aggregated_file:
+                outputs['aggregated'] = aggregated_file
+                outputs.update(rollup_outputs(standardized_file, aggregated_dir, output_format, top_n))
+        return outputs, file_report
+
+    standardized_df = standardize_swim_data.process_file(file_path, standardized_dir, bonus_points, engine=engine, file_report=file_report,
+                                                         output_format=output_format, background=background, best_times_db=best_times_db,
+                                                         identities_db=identities_db, segment_workers=segment_workers, event_patterns=event_patterns)
+    if standardized_df is None:
+        return outputs, file_report
+    standardized_name = standardize_swim_data.standardized_filename(file_path, output_format)
+    if standardized_dir:
+        outputs['standardized'] = os.path.join(standardized_dir, standardized_name)
+    if database:
+        with report.stage(file_report, 'store_database') as stage:
+            store.store_results(database, file_path, manifest.file_hash(file_path), bonus_points, [standardized_df])
+            report.count_rows(stage, rows_in=len(standardized_df))
+        outputs['database'] = database
+
+    if aggregated_dir:
+        # Hand the standardized frame straight to the aggregation step
+        with report.stage(file_report, 'prepare_aggregation') as stage:
+            df = aggregate_swim_data.prepare_data(standardized_df, file_path, skipped=stage.setdefault('skipped', {}))
+            report.count_rows(stage, rows_in=len(standardized_df), rows_out=len(df) if df is not None else 0)
+        if df is not None:
+            outputs['aggregated'] = aggregate_swim_data.save_aggregated(df, standardized_name, aggregated_dir, file_report, output_format, background,
+                                                                        top_n, leaders_by)
+            outputs.update(rollup_outputs(standardized_name, aggregated_dir, output_format, top_n))
+    return outputs, file_report
+
+# Function to list the rollup files written for a standardized file, by rollup (none without top_n)
+def rollup_outputs(standardized_file, aggregated_dir, output_format='csv', top_n=None):
+    from . import rollups
+    if not top_n:
+        return {}
+    return {rollup: os.path.join(aggregated_dir, rollups.rollup_filename(standardized_file, rollup, output_format)) for rollup in rollups.ROLLUPS}
+
 def main():
     parser = argparse.ArgumentParser(description="Run swim data standardization and aggregation pipeline")
-    parser.add_argument('--input-dir', help='Directory containing input Excel files (prompted if not provided)')
-    parser.add_argument('--standardized-dir', help='Directory for standardized CSV files (created as standardized_results if not provided)')
-    parser.add_argument('--aggregated-dir', help='Directory for aggregated CSV files (created as aggregated_results if not provided)')
+    parser.add_argument('--config', help='JSON file of option values (e.g. {"input_dir": "results", "aggregate_results": true, "pb_points": 3}); options given on the command line take precedence')
+    parser.add_argument('--non-interactive', action='store_true', help='Never prompt: a missing input directory is an error, aggregation only runs with --aggregate-results and bonus points come from the options')
+    parser.add_argument('--dev-points', type=int, help='DEV bonus points (default 3)')
+    parser.add_argument('--adv-points', type=int, help='ADV bonus points (default 6)')
+    parser.add_argument('--nt-points', type=int, help='Bonus points for a swim without a seed time (default 1)')
+    parser.add_argument('--pb-points', type=int, help='PB bonus points (default 2)')
+    parser.add_argument('--scoring-rules', help='JSON file of scoring rules (bonus points per condition, multipliers and caps) used instead of the DEV/ADV/NT/PB bonus points')
+    parser.add_argument('--input-dir', help='Directory (or zip/tar archive) containing input Excel files (prompted if not provided)')
+    parser.add_argument('--standardized-dir', help='Directory for standardized files (created as standardized_results if not provided)')
+    parser.add_argument('--aggregated-dir', help='Directory for aggregated files (created as aggregated_results if not provided)')
+    parser.add_argument('--output-format', choices=OUTPUT_FORMATS, default='csv', help='Format of the standardized and aggregated files (parquet and feather need pyarrow)')
     parser.add_argument('--aggregate-results', action='store_true', help='Flag to indicate if aggregation of results should be performed')
     parser.add_argument('--no-bonus-points', action='store_true', help='Do not calculate bonus points, i.e time points- DEV and ADV, PB points, etc')
     parser.add_argument('--custom-bonus-points', action='store_true', help='Award custom bonus points for time or PBs. User will be prompted for each value (standard points are "DEV:3, ADV:6, NT:1,PB:2")')
+    parser.add_argument('--keep-standardized', action='store_true', help='Also write standardized CSV files when aggregating (they are always written when aggregation is off)')
+    parser.add_argument('--force', action='store_true', help='Rebuild all outputs, even for input files that have not changed since the last run')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes used to process files in parallel')
+    parser.add_argument('--event-patterns', help='JSON file with extra gender, course and stroke patterns for event names')
+    parser.add_argument('--streaming', action='store_true', help='Stream each workbook row by row and write the standardized file (CSV or JSONL) in chunks, keeping memory flat for very large files')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='Rows per chunk in streaming mode')
+    parser.add_argument('--database', help='SQLite database the standardized records are also stored in, for history lookups (see store.py)')
+    parser.add_argument('--best-times', help='Best-times index (SQLite) that PB and NT bonuses are checked against instead of only the seed times; each meet is added to it')
+    parser.add_argument('--identities', help='Identity registry (SQLite) that keeps SwimmerIDs stable across meets and matches spelling variants of a name within a team')
+    parser.add_argument('--rollups', action='store_true', help='Also write team totals, Gender/AgeGroup standings and event leaderboards for each meet to the aggregated directory')
+    parser.add_argument('--top-n', type=int, default=3, help='Swimmers per Gender/AgeGroup standing and per event leaderboard with --rollups')
+    parser.add_argument('--leaders-by', choices=('FinalsTime', 'TotalPoints'), default='FinalsTime', help='Rank event leaderboards by fastest FinalsTime or highest TotalPoints')
+    parser.add_argument('--season-state', help='Season state file; new or changed meets are added to per-swimmer season totals written to season_results.csv in the aggregated directory')
+    parser.add_argument('--engine', choices=ENGINES, default='vectorized', help='Standardization engine (rowwise is the original row-by-row loop)')
+    parser.add_argument('--report', help='Write a JSON run report with per-file stage timings, row counts, skipped rows and bytes written')
+    parser.add_argument('--profile', help='Run the pipeline under cProfile and save the stats to this file')
+    parser.add_argument('--watch', action='store_true', help='Keep running and process new or updated workbooks as they land in the input directory')
+    parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds between checks of the input directory in watch mode')
+    parser.add_argument('--settle-time', type=float, default=2.0, help='Seconds a changed workbook must stay unchanged before it is processed in watch mode')
     
+    # Option values from a config file become the defaults
+    config_args, _ = parser.parse_known_args()
+    if config_args.config:
+        try:
+            with open(config_args.config, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            parser.error(f"Could not read config file {config_args.config}: {e}")
+        unknown = sorted(set(config) - {action.dest for action in parser._actions})
+        if unknown:
+            parser.error(f"Unknown options in config file {config_args.config}: {', '.join(unknown)}")
+        parser.set_defaults(**config)
+
     args = parser.parse_args()
+    if args.output_format in ('parquet', 'feather'):
+        from . import formats
+        try:
+            formats.check_format(args.output_format)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.streaming and args.output_format not in ('csv', 'jsonl'):
+        parser.error('--streaming writes csv or jsonl output')
+    if args.event_patterns and not os.path.isfile(args.event_patterns):
+        parser.error(f"Event patterns file not found: {args.event_patterns}")
+    if args.best_times and args.engine == 'rowwise':
+        parser.error('--best-times needs the vectorized engine')
+    if args.identities and args.engine == 'rowwise':
+        parser.error('--identities needs the vectorized engine')
+    if args.profile:
+        if args.workers > 1:
+            logger.warning("Profiling only covers the main process. Use --workers 1 to profile file processing.")
+        report.profiled(run_pipeline, args.profile, args)
+    else:
+        run_pipeline(args)
+
+def run_pipeline(args):
+    """Run the pipeline for parsed command-line arguments."""
+    # Check a given input directory before asking anything
+    if args.input_dir and not validate_input(args.input_dir):
+        logger.error("Invalid or missing input directory. Exiting.")
+        sys.exit(1)
 
     # prompt for Aggregate results to be generated
-    if not args.aggregate_results:
+    if not args.aggregate_results and not args.non_interactive:
         input_aggregate = input("Do you want to Aggregate Results generated? (yes/no): ").strip().lower()
         if input_aggregate in ['yes', 'y']:
             args.aggregate_results = True
@@ -46,12 +220,18 @@ def main():
 
     # Prompt for input directory if not provided
     input_dir = args.input_dir
-    if not input_dir:
+    if not input_dir and not args.non_interactive:
         input_dir = input("Enter the input directory for Excel files (e.g., results): ").strip()
-    input_dir = validate_directory(input_dir, create_if_missing=False)
+    input_dir = validate_input(input_dir)
     if not input_dir:
         logger.error("Invalid or missing input directory. Exiting.")
         sys.exit(1)
+    if args.watch and archives.is_archive(input_dir):
+        logger.error("Watch mode needs an input directory, not an archive. Exiting.")
+        sys.exit(1)
+
+    # Set the bonus points (before any output directory is created)
+    custom_bonus_points = resolve_bonus_points(args)
 
     # Set or create standardized output directory
     standardized_dir = args.standardized_dir or 'standardized_results'
@@ -60,40 +240,8 @@ def main():
         logger.error("Invalid or missing standardized output directory. Exiting.")
         sys.exit(1)
 
-    # Set custom bonus points if provided
-    if args.custom_bonus_points or args.no_bonus_points:
-        if args.custom_bonus_points:
-            logger.info("Custom bonus points will be set. Please provide values for DEV, ADV, NT, and PB points.")
-            # Prompt for custom bonus points
-            dev_points = input("Enter DEV points (default 3): ").strip() or "3"
-            adv_points = input("Enter ADV points (default 6): ").strip() or "6"
-            nt_points = input("Enter NT points (default 1): ").strip() or "1"
-            pb_points = input("Enter PB points (default 2): ").strip() or "2"
-            custom_bonus_points = {
-                "DEV": dev_points,
-                "ADV": adv_points,
-                "NT": nt_points,
-                "PB": pb_points
-            }
-            logger.info(f"Custom bonus points provided: {custom_bonus_points}")
-        elif args.no_bonus_points:
-            logger.info("No bonus points will be calculated. Setting all bonus points to 0.")
-            custom_bonus_points = {"DEV": "0", "ADV": "0", "NT": "0", "PB": "0"}
-    else:
-        custom_bonus_points = {"DEV": "3", "ADV": "6", "NT": "1", "PB": "2"}
-        logger.info(f"Using default bonus points: {custom_bonus_points}")
-
-    # Run standardization script
-    logger.info("Running standardization script...")
-    try:
-        # Create a namespace for arguments
-        standardize_args = argparse.Namespace(input_dir=input_dir, output_dir=standardized_dir, bonus_points=custom_bonus_points)
-        standardize_swim_data.main(standardize_args)
-    except Exception as e:
-        logger.error(f"Standardization script failed: {e}")
-        sys.exit(1)
-
     # Set or create aggregated output directory
+    aggregated_dir = None
     if not args.aggregate_results:
         logger.info("Aggregation of results is not requested. Skipping aggregation step.")
     else:
@@ -103,18 +251,222 @@ def main():
             logger.error("Invalid or missing aggregated output directory. Exiting.")
             sys.exit(1)
 
-            
-        # Run aggregation script
-        logger.info("Running aggregation script...")
+    convert_inputs(args, input_dir, standardized_dir, aggregated_dir, custom_bonus_points)
+    logger.info("Pipeline completed successfully.")
+
+    # Keep converting workbooks as they are exported during a meet
+    if args.watch:
+        args.force = False
+        logger.info(f"Watching {input_dir} for new or updated results (press Ctrl+C to stop)...")
         try:
-            # Create a namespace for arguments
-            aggregate_args = argparse.Namespace(input_dir=standardized_dir, output_dir=aggregated_dir)
-            aggregate_swim_data.main(aggregate_args)
-        except Exception as e:
-            logger.error(f"Aggregation script failed: {e}")
+            for changed in watch.watch_directory(input_dir, args.poll_interval, args.settle_time):
+                logger.info(f"Detected changes in: {', '.join(changed)}")
+                convert_inputs(args, input_dir, standardized_dir, aggregated_dir, custom_bonus_points, changed)
+        except KeyboardInterrupt:
+            logger.info("Stopped watching.")
+
+def resolve_bonus_points(args):
+    """Work out the bonus points (or scoring rules) from the options, prompting only when asked to."""
+    if args.scoring_rules:
+        from . import scoring
+        try:
+            rules = scoring.load_rules(args.scoring_rules)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Invalid scoring rules file {args.scoring_rules}: {e}. Exiting.")
             sys.exit(1)
+        return rules
+    given_points = {
+        "DEV": args.dev_points,
+        "ADV": args.adv_points,
+        "NT": args.nt_points,
+        "PB": args.pb_points,
+    }
+    if args.no_bonus_points:
+        logger.info("No bonus points will be calculated. Setting all bonus points to 0.")
+        return {"DEV": "0", "ADV": "0", "NT": "0", "PB": "0"}
+    if any(points is not None for points in given_points.values()):
+        custom_bonus_points = {
+            key: str(points) if points is not None else DEFAULT_BONUS_POINTS[key]
+            for key, points in given_points.items()
+        }
+        logger.info(f"Custom bonus points provided: {custom_bonus_points}")
+        return custom_bonus_points
+    if args.custom_bonus_points and not args.non_interactive:
+        logger.info("Custom bonus points will be set. Please provide values for DEV, ADV, NT, and PB points.")
+        # Prompt for custom bonus points
+        dev_points = input("Enter DEV points (default 3): ").strip() or "3"
+        adv_points = input("Enter ADV points (default 6): ").strip() or "6"
+        nt_points = input("Enter NT points (default 1): ").strip() or "1"
+        pb_points = input("Enter PB points (default 2): ").strip() or "2"
+        custom_bonus_points = {
+            "DEV": dev_points,
+            "ADV": adv_points,
+            "NT": nt_points,
+            "PB": pb_points
+        }
+        logger.info(f"Custom bonus points provided: {custom_bonus_points}")
+        return custom_bonus_points
+    if args.custom_bonus_points:
+        logger.error("--custom-bonus-points prompts for values; in non-interactive mode use --dev-points, --adv-points, --nt-points and --pb-points. Exiting.")
+        sys.exit(1)
+    custom_bonus_points = dict(DEFAULT_BONUS_POINTS)
+    logger.info(f"Using default bonus points: {custom_bonus_points}")
+    return custom_bonus_points
 
-    logger.info("Pipeline completed successfully.")
+# Function to collect the options besides the bonus points that change the outputs, for the build manifest
+def build_settings(args):
+    settings = {}
+    if args.event_patterns:
+        # Hash the patterns, as editing the file changes how event names are parsed
+        settings['event_patterns'] = manifest.file_hash(args.event_patterns)
+    if args.rollups:
+        settings['rollups'] = {'top_n': args.top_n, 'leaders_by': args.leaders_by}
+    if args.best_times:
+        # PB points come from the best-times index, so adding or switching it rebuilds the outputs
+        settings['best_times'] = os.path.abspath(args.best_times)
+    if args.identities:
+        # SwimmerIDs come from the registry, so adding or switching it rebuilds the outputs
+        settings['identities'] = os.path.abspath(args.identities)
+    return settings
+
+def convert_inputs(args, input_dir, standardized_dir, aggregated_dir, custom_bonus_points, changed_inputs=None):
+    """Standardize (and aggregate) the input files that changed since the last run.
+
+    changed_inputs lists the workbooks known to have changed (in watch mode).
+    When given, only those are hashed; the others keep the hash recorded in
+    the manifest, so an update during a meet does not read every workbook.
+    """
+    from . import standardize_swim_data
+    from . import aggregate_swim_data
+    from . import season
+    from . import formats
+    started = time.perf_counter()
+
+    # Standardized files are intermediate when aggregating, so only write them when asked
+    # (streaming always writes them, as the workbook goes straight to the file)
+    write_standardized = args.keep_standardized or args.streaming or not aggregated_dir
+    chunk_size = args.chunk_size if args.streaming else None
+    workers = args.workers
+    top_n = args.top_n if args.rollups else None
+    best_times_db = os.path.abspath(args.best_times) if args.best_times else None
+    if best_times_db and workers > 1:
+        # Each meet's PBs depend on the meets before it, so they are processed one at a time
+        logger.warning("The best-times index is updated meet by meet; processing files with 1 worker.")
+        workers = 1
+    # Without worker processes, each file's outputs are written in the background while the next file is read
+    background = workers <= 1
+
+    # Work out which outputs each input file needs (archive members are read in place)
+    excel_files = archives.list_workbooks(input_dir)
+    if not excel_files:
+        logger.warning(f"No Excel files found in {input_dir}")
+    expected_outputs = {}
+    for file_name in excel_files:
+        outputs = {}
+        if write_standardized:
+            outputs['standardized'] = os.path.join(standardized_dir, standardize_swim_data.standardized_filename(file_name, args.output_format))
+        if aggregated_dir:
+            outputs['aggregated'] = os.path.join(aggregated_dir, aggregate_swim_data.aggregated_filename(standardize_swim_data.standardized_filename(file_name), args.output_format))
+        if aggregated_dir:
+            outputs.update(rollup_outputs(file_name, aggregated_dir, args.output_format, top_n))
+        if args.database:
+            outputs['database'] = os.path.abspath(args.database)
+        expected_outputs[file_name] = outputs
+
+    # Skip input files that have not changed since the last run
+    build_manifest = manifest.load_manifest(standardized_dir)
+    settings = build_settings(args)
+    input_hashes = {}
+    for f in excel_files:
+        entry = build_manifest['files'].get(f)
+        if changed_inputs is not None and f not in changed_inputs and entry and entry.get('hash'):
+            input_hashes[f] = entry['hash']
+        else:
+            input_hashes[f] = manifest.file_hash(os.path.join(input_dir, f))
+    build_manifest['files'] = {f: entry for f, entry in build_manifest['files'].items() if f in input_hashes}
+    stale_files = [
+        f for f in excel_files
+        if args.force or not all(
+            manifest.is_current(build_manifest['files'].get(f), input_hashes[f], custom_bonus_points, stage, output_file, settings)
+            for stage, output_file in expected_outputs[f].items()
+        )
+    ]
+    if best_times_db:
+        from . import best_times
+        # Process meets in order, so earlier times count as history for later meets. Once a meet has to be
+        # (re)built, or is missing from the index, the meets after it are rebuilt too, as their PBs may change.
+        excel_files.sort(key=best_times.meet_order)
+        indexed = best_times.recorded_meets(best_times_db)
+        first_stale = next((i for i, f in enumerate(excel_files) if f in stale_files or os.path.basename(f) not in indexed), len(excel_files))
+        stale_files = excel_files[first_stale:]
+    run_report = report.new_run_report(
+        input_dir=input_dir, engine=args.engine, workers=workers, streaming=args.streaming,
+        aggregate=bool(aggregated_dir), bonus_points=custom_bonus_points,
+    )
+    run_report['files'] = [
+        dict(report.new_file_report(f), status='up_to_date')
+        for f in excel_files if f not in stale_files
+    ]
+    changed_files = set()
+    if excel_files and not stale_files:
+        logger.info(f"All {len(excel_files)} input files are up to date. Skipping standardization and aggregation.")
+    elif stale_files:
+        # Run standardization (and aggregation) for each changed file
+        logger.info(f"Processing {len(stale_files)} of {len(excel_files)} input files...")
+        # When files are processed one at a time, the workers standardize the events of each large file instead
+        segment_workers = args.workers if workers <= 1 or len(stale_files) == 1 else 1
+        options = dict(
+            engine=args.engine, standardized_dir=standardized_dir if write_standardized else None, aggregated_dir=aggregated_dir,
+            event_patterns=args.event_patterns, chunk_size=chunk_size, database=os.path.abspath(args.database) if args.database else None,
+            output_format=args.output_format, background=background, best_times_db=best_times_db,
+            identities_db=os.path.abspath(args.identities) if args.identities else None, top_n=top_n, leaders_by=args.leaders_by,
+            segment_workers=segment_workers,
+        )
+        tasks = [functools.partial(run_file, os.path.join(input_dir, f), custom_bonus_points, **options) for f in stale_files]
+        outcomes = batch.run_batch(tasks, workers)
+        write_seconds = {}
+        failed_writes = formats.wait_for_writes(write_seconds)
+        failed = []
+        for file_name, (outcome, error) in zip(stale_files, outcomes):
+            if error is not None:
+                logger.error(f"Error processing file {file_name}: {error}")
+            outputs, file_report = outcome or ({}, report.new_file_report(file_name))
+            # Outputs that could not be written are not recorded as built
+            for output_file in outputs.values():
+                if output_file in failed_writes and error is None:
+                    error = failed_writes[output_file]
+            outputs = {stage: output_file for stage, output_file in outputs.items() if output_file not in failed_writes}
+            report.refresh_outputs(file_report, write_seconds)
+            for stage, output_file in outputs.items():
+                manifest.record_output(build_manifest, file_name, input_hashes[file_name], custom_bonus_points, stage, output_file, settings)
+                changed_files.add(output_file)
+            if set(outputs) != set(expected_outputs[file_name]):
+                failed.append(file_name)
+                file_report['status'] = 'failed'
+                if error is not None:
+                    file_report['error'] = str(error)
+            run_report['files'].append(file_report)
+            timings = ', '.join(f"{stage} {stage_report['seconds']:.2f} s" for stage, stage_report in file_report['stages'].items())
+            logger.info(f"Processed {file_name} in {file_report['seconds']:.2f} s ({timings})")
+        manifest.save_manifest(standardized_dir, build_manifest)
+        if failed:
+            logger.error(f"Processing failed for {len(failed)} of {len(stale_files)} files: {', '.join(failed)}")
+
+    # Fold new or changed meets into the season totals
+    if args.season_state:
+        if not aggregated_dir:
+            logger.warning("Season totals need aggregated results. Skipping season update.")
+        else:
+            aggregated_files = [
+                expected_outputs[f]['aggregated'] for f in excel_files
+                if manifest.is_current(build_manifest['files'].get(f), input_hashes[f], custom_bonus_points, 'aggregated', expected_outputs[f]['aggregated'],
+                                       settings)
+            ]
+            season.update_season(args.season_state, aggregated_files, os.path.join(aggregated_dir, aggregate_swim_data.SEASON_FILENAME), changed_files)
+
+    if args.report:
+        run_report['files'].sort(key=lambda file_report: file_report['file'])
+        report.save_report(args.report, run_report, started)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,89 @@
+import pandas as pd
+
+# Compact dtypes of the standardized columns. Repeated labels are categorical,
+# times are float32 and bonus points are small nullable integers (NA when zero).
+STANDARDIZED_DTYPES = {
+    'MeetName': 'category',
+    'Date': 'category',
+    'Event': 'category',
+    'Gender': 'category',
+    'AgeGroup': 'category',
+    'Distance': 'category',
+    'Stroke': 'category',
+    'Category': 'category',
+    'Team': 'category',
+    'SeedTime': 'float32',
+    'FinalsTime': 'float32',
+    'Improvement': 'float32',
+    'DQ': 'boolean',
+    'PlacePoints': 'float32',
+    'PBPoints': 'Int16',
+    'TimePoints': 'Int16',
+    'TotalPoints': 'float32',
+}
+
+# Standardized columns kept as text
+STANDARDIZED_TEXT = ['SwimmerName', 'Age', 'Rank', 'Qualification', 'SwimmerID']
+
+# Compact dtypes of the aggregated columns
+AGGREGATED_DTYPES = {
+    'MeetName': 'category',
+    'Date': 'category',
+    'Gender': 'category',
+    'AgeGroup': 'category',
+    'Team': 'category',
+    'PlacePoints': 'int32',
+    'TimePoints': 'int32',
+    'PBPoints': 'int32',
+    'TotalPoints': 'int32',
+    'QualificationADVCount': 'int16',
+    'QualificationDEVCount': 'int16',
+}
+
+# How the DQ flag is written to CSV (as in the original output)
+DQ_TEXT = 'DQ'
+
+# Function to cast the columns of a frame to a schema (columns not in the frame are ignored)
+def apply(df, dtypes):
+    return df.astype({column: dtype for column, dtype in dtypes.items() if column in df.columns})
+
+# Function to cast a standardized frame to the standardized schema
+def standardized(df):
+    return apply(df, STANDARDIZED_DTYPES)
+
+# Function to cast an aggregated frame to the aggregated schema
+def aggregated(df):
+    return apply(df, AGGREGATED_DTYPES)
+
+# Function to turn a column of DQ markers ("DQ" or empty) into nullable booleans
+def dq_flags(values):
+    if isinstance(values.dtype, pd.BooleanDtype):
+        return values
+    return values.notna() & values.astype(object).map(lambda value: DQ_TEXT in str(value).upper())
+
+# Function to write a standardized frame to CSV in the original text layout
+def write_csv(df, output_file, **kwargs):
+    """Write a standardized frame to CSV, rendering the DQ flag as "DQ" or empty."""
+    if 'DQ' in df.columns:
+        is_dq = df['DQ'].fillna(False).astype(bool)
+        df = df.assign(DQ=pd.Series(DQ_TEXT, index=df.index, dtype=object).where(is_dq))
+    df.to_csv(output_file, index=False, **kwargs)
+
+# Function to read a standardized CSV straight into the standardized schema
+def read_standardized_csv(file_path, chunksize=None):
+    """Read a standardized CSV with the standardized dtypes.
+
+    With chunksize, returns an iterator of DataFrames of at most that many rows.
+    """
+    dtypes = dict.fromkeys(STANDARDIZED_TEXT, str)
+    dtypes.update(STANDARDIZED_DTYPES)
+    dtypes['DQ'] = str
+    if chunksize:
+        return (_read_dq(chunk) for chunk in pd.read_csv(file_path, dtype=dtypes, chunksize=chunksize))
+    return _read_dq(pd.read_csv(file_path, dtype=dtypes))
+
+# Function to turn the DQ column of a frame read from CSV into nullable booleans
+def _read_dq(df):
+    if 'DQ' in df.columns:
+        df['DQ'] = dq_flags(df['DQ']).astype('boolean')
+    return df
@@ -0,0 +1,195 @@
+import json
+import logging
+
+import pandas as pd
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Conditions a rule can test, and the context column each one reads
+BOOLEAN_CONDITIONS = {
+    'no_seed': 'NoSeed',
+    'improved': 'Improved',
+    'dq': 'DQ',
+    'relay': 'Relay',
+}
+TEXT_CONDITIONS = {
+    # Matched as case-insensitive substrings
+    'qualification': 'Qualification',
+    'event': 'Event',
+}
+VALUE_CONDITIONS = {
+    # Matched against one value or a list of values
+    'age_group': 'AgeGroup',
+    'gender': 'Gender',
+    'stroke': 'Stroke',
+    'distance': 'Distance',
+}
+
+# Columns bonus rules can award points to (whole points) and columns multipliers can scale
+BONUS_COLUMNS = ('PBPoints', 'TimePoints')
+MULTIPLIER_COLUMNS = ('PlacePoints', 'TotalPoints')
+CAP_COLUMNS = ('PlacePoints', 'PBPoints', 'TimePoints', 'TotalPoints')
+
+# Swims that get no bonus points unless a rule says otherwise
+DEFAULT_EXCLUDE = ['dq', 'relay']
+
+# Compiled rules per distinct configuration
+_compiled = {}
+
+# Function to build the rules equivalent to a DEV/ADV/NT/PB bonus points dict
+def default_rules(bonus_points):
+    return {
+        'rules': [
+            {'column': 'TimePoints', 'when': {'qualification': 'ADV'}, 'points': int(bonus_points['ADV'])},
+            {'column': 'TimePoints', 'when': {'qualification': 'DEV'}, 'points': int(bonus_points['DEV'])},
+            {'column': 'PBPoints', 'when': {'no_seed': True}, 'points': int(bonus_points['NT'])},
+            {'column': 'PBPoints', 'when': {'improved': True}, 'points': int(bonus_points['PB'])},
+        ],
+    }
+
+# Function to load scoring rules from a JSON file
+def load_rules(file_path):
+    """Load and check a scoring rules file.
+
+    The file holds "rules" (bonus points per swim), and optionally "exclude",
+    "multipliers" and "caps", e.g.
+    {"rules": [{"column": "PBPoints", "when": {"improved": true}, "points": 2},
+               {"column": "PBPoints", "when": {"age_group": "8 & Under"}, "points": 1}],
+     "multipliers": [{"column": "PlacePoints", "when": {"relay": true}, "factor": 2}],
+     "caps": {"PBPoints": 3, "TotalPoints": 40}}
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    compile_rules(config)
+    logger.info(f"Loaded scoring rules from {file_path}")
+    return config
+
+# Function to compile the conditions of a rule into (context column, kind, values) tests
+def _compile_conditions(conditions):
+    tests = []
+    for name, value in conditions.items():
+        if name in BOOLEAN_CONDITIONS:
+            tests.append((BOOLEAN_CONDITIONS[name], 'is', bool(value)))
+        elif name in TEXT_CONDITIONS:
+            values = value if isinstance(value, list) else [value]
+            tests.append((TEXT_CONDITIONS[name], 'contains', [str(v).upper() for v in values]))
+        elif name in VALUE_CONDITIONS:
+            values = value if isinstance(value, list) else [value]
+            tests.append((VALUE_CONDITIONS[name], 'in', [str(v).strip() for v in values]))
+        else:
+            raise ValueError(f"Unknown scoring condition: {name}")
+    return tests
+
+# Function to compile a scoring configuration (or a DEV/ADV/NT/PB bonus points dict) once
+def compile_rules(config):
+    key = json.dumps(config, sort_keys=True)
+    compiled = _compiled.get(key)
+    if compiled is not None:
+        return compiled
+    if 'rules' not in config:
+        if not {'DEV', 'ADV', 'NT', 'PB'} <= set(config):
+            raise ValueError('Scoring rules need a "rules" list (or DEV, ADV, NT and PB bonus points)')
+        config = default_rules(config)
+
+    default_exclude = _compile_conditions(dict.fromkeys(config.get('exclude', DEFAULT_EXCLUDE), True))
+    rules = []
+    for rule in config['rules']:
+        if rule.get('column') not in BONUS_COLUMNS:
+            raise ValueError(f"Scoring rules can award {' or '.join(BONUS_COLUMNS)}, not {rule.get('column')}")
+        if int(rule['points']) != rule['points']:
+            raise ValueError(f"Bonus points must be whole numbers: {rule['points']}")
+        exclude = rule.get('exclude')
+        rules.append({
+            'column': rule['column'],
+            'tests': _compile_conditions(rule.get('when', {})),
+            'exclude': default_exclude if exclude is None else _compile_conditions(dict.fromkeys(exclude, True)),
+            'points': int(rule['points']),
+        })
+    multipliers = []
+    for multiplier in config.get('multipliers', []):
+        if multiplier.get('column') not in MULTIPLIER_COLUMNS:
+            raise ValueError(f"Multipliers can scale {' or '.join(MULTIPLIER_COLUMNS)}, not {multiplier.get('column')}")
+        multipliers.append({
+            'column': multiplier['column'],
+            'tests': _compile_conditions(multiplier.get('when', {})),
+            'factor': float(multiplier['factor']),
+        })
+    caps = config.get('caps', {})
+    unknown = set(caps) - set(CAP_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown capped columns: {', '.join(sorted(unknown))}")
+
+    compiled = {'rules': rules, 'multipliers': multipliers, 'caps': dict(caps)}
+    _compiled[key] = compiled
+    return compiled
+
+# Function to evaluate compiled tests over the context frame (all tests must match)
+def _matches(context, tests, masks):
+    matched = pd.Series(True, index=context.index)
+    for column, kind, values in tests:
+        mask_key = (column, kind, json.dumps(values))
+        mask = masks.get(mask_key)
+        if mask is None:
+            if kind == 'is':
+                mask = context[column] == values
+            elif kind == 'contains':
+                text = context[column].astype(str).str.upper()
+                mask = pd.Series(False, index=context.index)
+                for value in values:
+                    mask |= text.str.contains(value, regex=False, na=False)
+            else:
+                mask = context[column].astype(object).map(lambda cell: str(cell).strip(), na_action='ignore').isin(values)
+            masks[mask_key] = mask.fillna(False).astype(bool)
+            mask = masks[mask_key]
+        matched &= mask
+    return matched
+
+# Function to flag the swims matching any of the exclusion tests
+def _excluded(context, tests, masks):
+    excluded = pd.Series(False, index=context.index)
+    for test in tests:
+        excluded |= _matches(context, [test], masks)
+    return excluded
+
+# Function to score a whole frame of swims
+def score(config, context):
+    """Score swims as column expressions and return the point columns.
+
+    context holds one row per swim with the columns the conditions read
+    (NoSeed, Improved, DQ, Relay, Qualification, Event, AgeGroup, Gender,
+    Stroke, Distance) and PlacePoints. config is a scoring configuration or a
+    DEV/ADV/NT/PB bonus points dict. Returns PlacePoints, PBPoints, TimePoints
+    and TotalPoints; the bonus columns are whole numbers.
+    """
+    compiled = compile_rules(config)
+    masks = {}
+    points = pd.DataFrame({
+        'PlacePoints': context['PlacePoints'].astype(float),
+        'PBPoints': 0,
+        'TimePoints': 0,
+    }, index=context.index)
+
+    for rule in compiled['rules']:
+        awarded = _matches(context, rule['tests'], masks) & ~_excluded(context, rule['exclude'], masks)
+        points[rule['column']] += awarded * rule['points']
+
+    for multiplier in compiled['multipliers']:
+        if multiplier['column'] == 'PlacePoints':
+            scaled = _matches(context, multiplier['tests'], masks)
+            points['PlacePoints'] = points['PlacePoints'].where(~scaled, points['PlacePoints'] * multiplier['factor'])
+
+    caps = compiled['caps']
+    for column in ('PlacePoints', 'PBPoints', 'TimePoints'):
+        if column in caps:
+            points[column] = points[column].clip(upper=caps[column])
+
+    total_points = points['PlacePoints'] + points['PBPoints'] + points['TimePoints']
+    for multiplier in compiled['multipliers']:
+        if multiplier['column'] == 'TotalPoints':
+            scaled = _matches(context, multiplier['tests'], masks)
+            total_points = total_points.where(~scaled, total_points * multiplier['factor'])
+    if 'TotalPoints' in caps:
+        total_points = total_points.clip(upper=caps['TotalPoints'])
+    points['TotalPoints'] = total_points.where(total_points > 0, 0.0)
+    return points
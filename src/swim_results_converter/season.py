@@ -0,0 +1,188 @@
+import json
+import logging
+import os
+import sqlite3
+
+import pandas as pd
+
+try:
+    from . import formats
+    from . import identity
+except ImportError:
+    import formats
+    import identity
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Columns identifying a swimmer across meets (Age and AgeGroup change during a season; the team is part of the SwimmerID)
+SEASON_KEYS = ['SwimmerID', 'Gender']
+
+# Columns shown for each swimmer, taken from the first meet the swimmer is seen in
+SEASON_NAMES = ['SwimmerName', 'Team']
+
+# Running totals kept per swimmer
+SEASON_TOTALS = ['PlacePoints', 'TimePoints', 'PBPoints', 'TotalPoints', 'QualificationADVCount', 'QualificationDEVCount']
+
+# Columns of the season table
+SEASON_COLUMNS = ['SwimmerName', 'Gender', 'Team'] + SEASON_TOTALS + ['MeetsAttended', 'SwimmerID']
+
+# The totals have no declared type, so integer points stay integers and fractional points stay fractional
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS meets (
+    MeetKey TEXT PRIMARY KEY,
+    Swimmers INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS swimmers (
+    SwimmerID TEXT NOT NULL,
+    Gender TEXT NOT NULL,
+    SwimmerName TEXT,
+    Team TEXT,
+    {', '.join(SEASON_TOTALS)},
+    MeetsAttended INTEGER NOT NULL,
+    PRIMARY KEY (SwimmerID, Gender)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS contributions (
+    MeetKey TEXT NOT NULL,
+    SwimmerID TEXT NOT NULL,
+    Gender TEXT NOT NULL,
+    {', '.join(SEASON_TOTALS)},
+    PRIMARY KEY (MeetKey, SwimmerID, Gender)
+) WITHOUT ROWID;
+"""
+
+# First bytes of an SQLite database file
+SQLITE_HEADER = b'SQLite format 3\x00'
+
+# Function to open (and if needed create) a season state database
+def connect(state_file, timeout=30.0):
+    if os.path.exists(state_file) and os.path.getsize(state_file) > 0:
+        with open(state_file, 'rb') as f:
+            is_database = f.read(len(SQLITE_HEADER)) == SQLITE_HEADER
+        if not is_database:
+            _convert_json_state(state_file)
+    connection = sqlite3.connect(state_file, timeout=timeout)
+    connection.executescript(SCHEMA)
+    return connection
+
+# Function to move a season state file of an older version (JSON) into a state database
+def _convert_json_state(state_file):
+    with open(state_file, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    temp_path = f"{state_file}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    connection = sqlite3.connect(temp_path)
+    try:
+        connection.executescript(SCHEMA)
+        if state.get('keys') != SEASON_KEYS:
+            # Older seasons were keyed by name; every meet is applied again when it is next seen
+            logger.warning(f"Season state {state_file} is keyed by swimmer name; rebuilding it by SwimmerID")
+        else:
+            with connection:
+                for meet_key, contributions in state.get('meets', {}).items():
+                    # Meets are keyed by file name without extension, so changing the output format does not count a meet twice
+                    meet_key = os.path.splitext(meet_key)[0]
+                    connection.execute('INSERT OR REPLACE INTO meets VALUES (?, ?)', (meet_key, len(contributions)))
+                    connection.executemany(
+                        f"INSERT OR REPLACE INTO contributions VALUES ({', '.join('?' * (len(SEASON_TOTALS) + 3))})",
+                        [(meet_key, *json.loads(key), *values) for key, values in contributions.items()],
+                    )
+                connection.executemany(
+                    f"INSERT INTO swimmers VALUES ({', '.join('?' * (len(SEASON_TOTALS) + 5))})",
+                    [(*json.loads(key), *totals['names'], *totals['values'], totals['meets'])
+                     for key, totals in state.get('swimmers', {}).items()],
+                )
+            logger.info(f"Converted season state {state_file} to a database")
+    finally:
+        connection.close()
+    os.replace(temp_path, state_file)
+
+# Function to add (sign=1) or remove (sign=-1) one meet's contributions from the running totals
+def _apply_contributions(connection, rows, sign):
+    """Update the totals of the swimmers in rows only.
+
+    Each row is (SwimmerID, Gender, SwimmerName, Team, *totals); the names are
+    only used for swimmers new to the season.
+    """
+    if sign > 0:
+        connection.executemany(
+            f"INSERT INTO swimmers (SwimmerID, Gender, SwimmerName, Team, {', '.join(SEASON_TOTALS)}, MeetsAttended) "
+            f"VALUES ({', '.join('?' * (len(SEASON_TOTALS) + 4))}, 1) "
+            f"ON CONFLICT (SwimmerID, Gender) DO UPDATE SET "
+            f"{', '.join(f'{column} = {column} + excluded.{column}' for column in SEASON_TOTALS)}, MeetsAttended = MeetsAttended + 1",
+            rows,
+        )
+        return
+    connection.executemany(
+        f"UPDATE swimmers SET {', '.join(f'{column} = {column} - ?' for column in SEASON_TOTALS)}, MeetsAttended = MeetsAttended - 1 "
+        f"WHERE SwimmerID = ? AND Gender = ?",
+        [(*row[4:], row[0], row[1]) for row in rows],
+    )
+    connection.executemany(
+        'DELETE FROM swimmers WHERE SwimmerID = ? AND Gender = ? AND MeetsAttended <= 0', [row[:2] for row in rows]
+    )
+
+# Function to fold one meet's aggregated data into the season
+def apply_meet(connection, meet_key, aggregated_df):
+    """Add a meet's aggregated results to the season totals.
+
+    Only the swimmers in this meet are touched, so the cost depends on the
+    size of the meet, not of the season. If the meet was applied before
+    (e.g. an updated results file), its previous contributions are replaced,
+    so applying the same meet twice is harmless.
+    """
+    if 'SwimmerID' not in aggregated_df.columns:
+        # Aggregated files written before SwimmerIDs were added get them from the names
+        aggregated_df = aggregated_df.assign(SwimmerID=identity.swimmer_ids(aggregated_df['SwimmerName'], aggregated_df['Team']))
+    grouped = aggregated_df.groupby(SEASON_KEYS, sort=False)
+    sums = grouped[SEASON_TOTALS].sum()
+    display = grouped[SEASON_NAMES].first()
+    rows = [
+        tuple(str(part) for part in key) + tuple(str(part) for part in names)
+        + tuple(value.item() if hasattr(value, 'item') else value for value in totals)
+        for key, names, totals in zip(sums.index, display.itertuples(index=False, name=None), sums.itertuples(index=False, name=None))
+    ]
+    with connection:
+        previous = connection.execute(
+            f"SELECT SwimmerID, Gender, NULL, NULL, {', '.join(SEASON_TOTALS)} FROM contributions WHERE MeetKey = ?", (meet_key,)
+        ).fetchall()
+        if previous:
+            _apply_contributions(connection, previous, -1)
+            connection.execute('DELETE FROM contributions WHERE MeetKey = ?', (meet_key,))
+        _apply_contributions(connection, rows, 1)
+        connection.executemany(
+            f"INSERT INTO contributions VALUES ({', '.join('?' * (len(SEASON_TOTALS) + 3))})",
+            [(meet_key, *row[:2], *row[4:]) for row in rows],
+        )
+        connection.execute('INSERT OR REPLACE INTO meets VALUES (?, ?)', (meet_key, len(rows)))
+    logger.info(f"Applied {meet_key} to the season: {len(rows)} swimmers updated")
+
+# Function to build the season table from the running totals
+def season_table(connection):
+    season_df = pd.read_sql_query(f"SELECT {', '.join(SEASON_COLUMNS)} FROM swimmers", connection)
+    return season_df.sort_values(['SwimmerName', 'Gender', 'Team', 'SwimmerID']).reset_index(drop=True)
+
+# Function to apply aggregated files to a season state database and save the season table
+def update_season(state_file, aggregated_files, output_file, changed_files=None):
+    """Fold aggregated files (in any output format) into the season state and write the season CSV.
+
+    Each file is one meet, keyed by its file name without extension. Files in changed_files (all
+    files when None) are always re-applied; others only if the season has not
+    seen them yet, so unchanged meets are never re-read. Folding a meet in
+    only updates its own swimmers; writing the season CSV afterwards reads
+    every swimmer of the season, once per update.
+    """
+    connection = connect(state_file)
+    try:
+        seen = {meet_key for (meet_key,) in connection.execute('SELECT MeetKey FROM meets')}
+        for file_path in aggregated_files:
+            meet_key = os.path.splitext(os.path.basename(file_path))[0]
+            if changed_files is not None and file_path not in changed_files and meet_key in seen:
+                continue
+            apply_meet(connection, meet_key, formats.read_aggregated(file_path))
+        season_table(connection).to_csv(output_file, index=False)
+    finally:
+        connection.close()
+    logger.info(f"Season results saved to {output_file}")
+    return output_file
@@ -0,0 +1,207 @@
+import argparse
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from . import aggregate_swim_data
+from . import events
+from . import formats
+from . import schema
+from . import standardize_swim_data
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Bonus points used when a request does not set them
+DEFAULT_BONUS_POINTS = {"DEV": "3", "ADV": "6", "NT": "1", "PB": "2"}
+
+# Function to import the heavy dependencies once per worker process
+def _warm_worker(event_patterns=None):
+    import openpyxl  # noqa: F401
+    try:
+        import xlrd  # noqa: F401
+    except ImportError:
+        pass
+    if event_patterns:
+        events.load_event_patterns(event_patterns)
+    # Keep the per-row logging of the conversion out of the server log
+    logging.getLogger().setLevel(logging.WARNING)
+
+# Function used to start the pool's worker processes ahead of the first request
+def _ping():
+    return os.getpid()
+
+# Function to convert one uploaded workbook in a worker process
+def convert_workbook(data, file_name, bonus_points, aggregate=False, output_format='csv', engine='vectorized'):
+    """Standardize (and optionally aggregate) workbook bytes and return the text of the response.
+
+    The upload is written to a temporary file under its original name, so the
+    meet name and date are extracted as for files on disk. Returns None when
+    the workbook could not be converted.
+    """
+    with tempfile.TemporaryDirectory() as work_dir:
+        file_path = os.path.join(work_dir, os.path.basename(file_name))
+        with open(file_path, 'wb') as f:
+            f.write(data)
+        df = standardize_swim_data.process_file(file_path, None, bonus_points, engine=engine)
+    if df is None:
+        return None
+    if aggregate:
+        df = aggregate_swim_data.prepare_data(df, file_name)
+        if df is None:
+            return None
+        df = aggregate_swim_data.aggregate_data(df)
+
+    if output_format == 'json':
+        return formats.json_ready(df).to_json(orient='records')
+    buffer = io.StringIO()
+    schema.write_csv(df, buffer)
+    return buffer.getvalue()
+
+# Function to read the bonus points of a request (query values, falling back to the defaults)
+def bonus_points_from_query(query):
+    if query.get('no_bonus_points', ['false'])[0].lower() in ('1', 'true', 'yes'):
+        return {"DEV": "0", "ADV": "0", "NT": "0", "PB": "0"}
+    bonus_points = dict(DEFAULT_BONUS_POINTS)
+    for key in bonus_points:
+        value = query.get(key, query.get(key.lower(), [None]))[0]
+        if value is not None:
+            # Validate now so a bad value is a client error, not a failed conversion
+            int(value)
+            bonus_points[key] = value
+    return bonus_points
+
+# Request handler for the conversion service
+class ConversionHandler(BaseHTTPRequestHandler):
+    """Handle GET /health and POST /convert.
+
+    POST /convert takes the workbook as the raw request body. Query parameters:
+    filename (required, e.g. 2025-meet1-results.xlsx), aggregate (true/false),
+    format (csv or json), DEV/ADV/NT/PB bonus points or no_bonus_points=true.
+    """
+    server_version = 'SwimResultsConverter'
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} - {format % args}")
+
+    def _send(self, status, body, content_type='application/json'):
+        body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        self._send(status, json.dumps({'error': message}))
+
+    def do_GET(self):
+        if urlparse(self.path).path != '/health':
+            self._send_error(404, 'Not found')
+            return
+        self._send(200, json.dumps({'status': 'ok', 'workers': self.server.workers}))
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/convert':
+            self._send_error(404, 'Not found')
+            return
+        query = parse_qs(url.query)
+
+        file_name = query.get('filename', [self.headers.get('X-Filename', '')])[0]
+        if not file_name.lower().endswith(('.xls', '.xlsx')):
+            self._send_error(400, 'A filename ending in .xls or .xlsx is required')
+            return
+        output_format = query.get('format', ['csv'])[0].lower()
+        if output_format not in ('csv', 'json'):
+            self._send_error(400, 'format must be csv or json')
+            return
+        aggregate = query.get('aggregate', ['false'])[0].lower() in ('1', 'true', 'yes')
+        try:
+            bonus_points = bonus_points_from_query(query)
+        except ValueError:
+            self._send_error(400, 'Bonus points must be whole numbers')
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            self._send_error(400, 'The request body must contain the workbook')
+            return
+        if length > self.server.max_upload_bytes:
+            self._send_error(413, 'Workbook is too large')
+            return
+
+        # At the concurrency limit, wait up to queue_timeout seconds for a slot, then answer 503
+        if not self.server.slots.acquire(timeout=self.server.queue_timeout):
+            self._send_error(503, 'Too many conversions in progress, try again later')
+            return
+        try:
+            data = self.rfile.read(length)
+            future = self.server.executor.submit(
+                convert_workbook, data, file_name, bonus_points, aggregate, output_format, self.server.engine,
+            )
+            body = future.result()
+        except Exception as e:
+            logger.error(f"Error converting {file_name}: {e}")
+            self._send_error(500, f'Conversion failed: {e}')
+            return
+        finally:
+            self.server.slots.release()
+
+        if body is None:
+            self._send_error(422, f'Could not convert {file_name}')
+            return
+        self._send(200, body, 'application/json' if output_format == 'json' else 'text/csv; charset=utf-8')
+
+# Function to create the conversion server (call serve_forever to run it)
+def create_server(host='127.0.0.1', port=8765, workers=2, max_concurrent=None, queue_timeout=30.0,
+                  max_upload_mb=50, engine='vectorized', event_patterns=None):
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker, initargs=(event_patterns,))
+    # Start every worker now, so the first requests do not pay for the imports
+    for future in [executor.submit(_ping) for _ in range(workers)]:
+        future.result()
+
+    server = ThreadingHTTPServer((host, port), ConversionHandler)
+    server.executor = executor
+    server.workers = workers
+    server.engine = engine
+    server.slots = threading.BoundedSemaphore(max_concurrent or workers * 2)
+    server.queue_timeout = queue_timeout
+    server.max_upload_bytes = int(max_upload_mb * 1024 * 1024)
+    return server
+
+# Main function
+def main():
+    parser = argparse.ArgumentParser(description="Serve swim results conversion over HTTP on this machine")
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (defaults to localhost only)')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+    parser.add_argument('--workers', type=int, default=2, help='Number of warm worker processes')
+    parser.add_argument('--max-concurrent', type=int, help='Conversions accepted at once (defaults to twice the workers); others wait up to --queue-timeout seconds, then get a 503')
+    parser.add_argument('--queue-timeout', type=float, default=30.0, help='Seconds a request waits for a free slot')
+    parser.add_argument('--max-upload-mb', type=float, default=50, help='Largest accepted workbook in MB')
+    parser.add_argument('--engine', choices=standardize_swim_data.ENGINES, default='vectorized', help='Standardization engine')
+    parser.add_argument('--event-patterns', help='JSON file with extra gender, course and stroke patterns for event names')
+    args = parser.parse_args()
+
+    server = create_server(
+        args.host, args.port, args.workers, args.max_concurrent, args.queue_timeout,
+        args.max_upload_mb, args.engine, args.event_patterns,
+    )
+    logger.info(f"Serving on http://{args.host}:{server.server_port} with {args.workers} workers (POST /convert, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Stopping server.")
+    finally:
+        server.server_close()
+        server.executor.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -2,56 +2,156 @@ import pandas as pd
 import re
 import os
 import argparse
+import functools
 from datetime import datetime
 import logging
 import uuid
 
+try:
+    from . import archives
+    from . import batch
+    from . import best_times
+    from . import events
+    from . import formats
+    from . import identity
+    from . import report
+    from . import schema
+    from . import scoring
+    from . import times
+except ImportError:
+    import archives
+    import batch
+    import best_times
+    import events
+    import formats
+    import identity
+    import report
+    import schema
+    import scoring
+    import times
+
 # Set up logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Function to convert time strings (MM:SS.SS or SS.SS) to seconds
+# Function to convert time strings (MM:SS.SS or SS.SS) to seconds (scalar form of times.parse_times, without building a Series)
 def convert_time_to_seconds(time_str):
-    if pd.isna(time_str) or time_str in ['NT', 'DQ', 'DNF']:
+    return times.time_to_seconds(time_str)
+
+# Function to extract event details from event name (compiled once and cached per distinct name)
+def parse_event_name(event_name):
+    return events.parse_event_name(event_name)
+
+# Columns of the results sheet used by the standardization engines
+RESULT_COLUMNS = [0, 1, 2, 3, 4, 7, 9, 10, 11, 13]
+
+# Function to read a results workbook in a single pass
+def read_workbook(file_path):
+    """Read a results workbook once and return its title cell and data rows.
+
+    Only RESULT_COLUMNS are decoded, all as strings. The data rows keep the
+    original column positions as labels and, as before, skip the first row of
+    the sheet, which Excel exports use as a header. file_path may be a member
+    of a zip or tar archive (see archives.py).
+    """
+    df = pd.read_excel(archives.workbook_source(file_path), header=None, usecols=lambda column: column in RESULT_COLUMNS, dtype=str)
+    df = df.reindex(columns=RESULT_COLUMNS)
+    title = str(df.iloc[1, 0]) if len(df) > 1 else ''
+    return title, df.iloc[1:].reset_index(drop=True)
+
+# Cell values that read_excel treats as missing
+NA_STRINGS = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+}
+
+# Function to render a workbook cell the way read_workbook does (text, or None when missing)
+def _cell_text(value):
+    if value is None:
         return None
-    # Handle DQ cases (e.g., "DQ 3:49.50")
-    if 'DQ' in str(time_str):
-        time_str = str(time_str).replace('DQ', '').strip()
-        if not time_str:
+    if isinstance(value, float):
+        if value != value:
             return None
-    try:
-        # Check if time is in MM:SS.SS format
-        if ':' in str(time_str):
-            minutes, seconds = map(float, time_str.split(':'))
-            return round(minutes * 60 + seconds, 2)
-        # Otherwise, assume SS.SS format
-        return round(float(time_str), 2)
-    except (ValueError, TypeError) as e:
-        logger.error(f"Error converting time {time_str}: {e}")
-        return None
+        if value.is_integer():
+            value = int(value)
+    text = str(value)
+    return None if text in NA_STRINGS else text
 
-# Function to extract event details from event name
-def parse_event_name(event_name):
-    # Regex to extract gender, age group, distance, and stroke
-    pattern = r'(?P<gender>Girls|Boys|Mixed|Men|Women)\s*(?P<age_group>\d+-\d+\s*|\d+\s*(&\s*Under|Year\s*Olds|\d+\s*&\s*Over)?)?\s*(?P<distance>\d+)\s*SC\s*Meter\s*(?P<stroke>Freestyle|Butterfly|Medley Relay|Backstroke|Breaststroke|IM|Freestyle\s*Relay)'
-    match = re.search(pattern, event_name.strip())
-    if match:
-        return {
-            'Gender': match.group('gender'),
-            'AgeGroup': match.group('age_group') if match.group('age_group') else '12 & Over',
-            'Distance': match.group('distance'),
-            'Stroke': match.group('stroke')
-        }
-    logger.warning(f"Could not parse event name: {event_name}")
-    return {
-        'Gender': None,
-        'AgeGroup': None,
-        'Distance': None,
-        'Stroke': None
-    }
+# Function to yield the cells of each sheet row without building a DataFrame of the whole sheet
+def _iter_sheet_rows(file_path):
+    source = archives.workbook_source(file_path)
+    if file_path.lower().endswith('.xls'):
+        import xlrd
+        if isinstance(source, str):
+            book = xlrd.open_workbook(source, on_demand=True)
+        else:
+            book = xlrd.open_workbook(file_contents=source.getvalue(), on_demand=True)
+        try:
+            sheet = book.sheet_by_index(0)
+            for index in range(sheet.nrows):
+                row = []
+                for cell in sheet.row(index):
+                    if cell.ctype == xlrd.XL_CELL_DATE:
+                        value = xlrd.xldate.xldate_as_datetime(cell.value, book.datemode)
+                        # Time-only cells sit on the epoch date
+                        if value.date() in (datetime(1899, 12, 31).date(), datetime(1904, 1, 1).date()):
+                            value = value.time()
+                    elif cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR):
+                        value = None
+                    elif cell.ctype == xlrd.XL_CELL_BOOLEAN:
+                        value = bool(cell.value)
+                    else:
+                        value = cell.value
+                    row.append(value)
+                yield row
+        finally:
+            book.release_resources()
+    else:
+        import openpyxl
+        book = openpyxl.load_workbook(source, read_only=True, data_only=True)
+        try:
+            for row in book.worksheets[0].iter_rows(values_only=True):
+                yield row
+        finally:
+            book.close()
+
+# Function to stream a results workbook in chunks of data rows
+def iter_workbook_chunks(file_path, chunk_size=10000):
+    """Walk a results workbook row by row and yield its data rows in chunks.
+
+    Yields (title, chunk, current_event) tuples, where chunk is a DataFrame
+    shaped like the data rows of read_workbook and current_event is the event
+    in force before its first row. Only one chunk is held in memory at a time.
+    """
+    title = ''
+    current_event = None
+    chunk_event = None
+    rows = []
+    position = 0
+    for row in _iter_sheet_rows(file_path):
+        # read_excel skips blank rows
+        if all(_cell_text(value) is None for value in row):
+            continue
+        position += 1
+        if position == 1:
+            # The first row is the sheet header
+            continue
+        cells = [_cell_text(row[column]) if column < len(row) else None for column in RESULT_COLUMNS]
+        if position == 2:
+            title = str(cells[0])
+        if not rows:
+            chunk_event = current_event
+        rows.append(cells)
+        if cells[0] is not None and 'Event' in cells[0]:
+            current_event = clean_event_header(cells[0])
+        if len(rows) >= chunk_size:
+            yield title, pd.DataFrame(rows, columns=RESULT_COLUMNS, dtype=object), chunk_event
+            rows = []
+    if rows or position <= 1:
+        yield title, pd.DataFrame(rows, columns=RESULT_COLUMNS, dtype=object), chunk_event
 
 # Function to extract meet name and date from filename or metadata
-def extract_meet_info(file_path):
+def extract_meet_info(file_path, title=None):
     # Default values
     meet_name = os.path.splitext(os.path.basename(file_path))[0]
     meet_date = datetime.now().strftime('%Y-%m-%d')
@@ -66,27 +166,22 @@ def extract_meet_info(file_path):
         meet_date = f"{year}-07-01"  # Default to July 1 if only year is found
         logger.info(f"Extracted from filename: meet_name={meet_name}, meet_date={meet_date}")
     
-    # Try to read metadata or first row for more specific meet info
-    try:
-        df = pd.read_excel(file_path, nrows=1)
-        if 'Results' in str(df.iloc[0, 0]):
-            meet_name = str(df.iloc[0, 0]).replace('Results - ', '').strip()
-            logger.info(f"Extracted meet_name from file content: {meet_name}")
-    except Exception as e:
-        logger.warning(f"Could not read meet name from file {file_path}: {e}")
+    # Try to read metadata or first row for more specific meet info (unless the workbook was already read)
+    if title is None:
+        try:
+            df = pd.read_excel(archives.workbook_source(file_path), nrows=1)
+            title = str(df.iloc[0, 0])
+        except Exception as e:
+            logger.warning(f"Could not read meet name from file {file_path}: {e}")
+    if title and 'Results' in title:
+        meet_name = title.replace('Results - ', '').strip()
+        logger.info(f"Extracted meet_name from file content: {meet_name}")
     
     return meet_name, meet_date
 
-# Function to calculate time difference
+# Function to calculate time difference (scalar form of times.time_improvements)
 def calculate_time_diff(seed_time, final_time):
-    if pd.isna(seed_time) or pd.isna(final_time) or 'DNF' in str(final_time).upper():
-        return None
-    time_diff = final_time - seed_time
-    if time_diff > 0:
-        return None
-    return round(time_diff, 2)
-
-
+    return times.time_improvement(seed_time, final_time)
 
 # Calculate PB points
 def calculate_pb_points(seed_time, improvement, dq, event, nt_bonus,pb_bonus):
@@ -105,7 +200,7 @@ def calculate_pb_points(seed_time, improvement, dq, event, nt_bonus,pb_bonus):
         pb_points += int(pb_bonus)
 
 
-    return str(pb_points) if pb_points else None
+    return pb_points if pb_points else None
 
 # Calculate time points
 def calculate_time_points( dq,qualification, event, dev_bonus, adv_bonus):
@@ -121,129 +216,436 @@ def calculate_time_points( dq,qualification, event, dev_bonus, adv_bonus):
     if 'DEV' in str(qualification).upper():
         time_points += int(dev_bonus)
 
-    return str(time_points) if time_points else None
+    return time_points if time_points else None
 
 # Calculate total points
 def calculate_total_points(place_points, pb_points, time_points):
-    
-    # Convert points to integers/floats if they are strings
-    pb_points = int(pb_points) if pb_points is not None and str(pb_points).strip() else 0
-    time_points = int(time_points) if time_points is not None and str(time_points).strip() else 0
 
-    # Calculate total points
-    total_points = place_points + pb_points + time_points
+    # Calculate total points (no PB or time points are None)
+    total_points = place_points + (pb_points or 0) + (time_points or 0)
 
     #logger.debug(f"Calculating total points: place_points={place_points}, pb_points={pb_points}, time_points={time_points}, total_points={total_points}")
     return total_points if total_points > 0 else float(0)
 
+# Column order of the standardized output
+STANDARDIZED_COLUMNS = [
+    'MeetName', 'Date', 'Event', 'Gender', 'AgeGroup', 'Distance', 'Stroke', 'Category',
+    'SwimmerName', 'Age', 'Team', 'SeedTime', 'FinalsTime', 'Improvement', 'Rank', 'DQ',
+    'Qualification', 'PlacePoints', 'PBPoints', 'TimePoints', 'TotalPoints', 'SwimmerID',
+]
+
+# Available standardization engines
+ENGINES = ('vectorized', 'rowwise')
+
+# Function to clean an event header cell (e.g., "Event 1  Boys 50 SC Meter Freestyle)")
+def clean_event_header(header):
+    current_event = str(header).strip()
+    index = current_event.find("  ")
+    current_event = str(current_event[index+1:]).strip()
+    return current_event.replace(')', '') if ")" in current_event else current_event
+
+# Reasons a sheet row does not become a standardized record
+SKIP_REASONS = ('event_header', 'blank', 'label', 'missing_name', 'before_first_event')
+
+# Row-by-row standardization (reference implementation) of rows returned by read_workbook
+def standardize_rows(df, meet_name, meet_date, bonus_points, skipped=None):
+    if 'rules' in bonus_points:
+        raise ValueError("The rowwise engine only supports DEV/ADV/NT/PB bonus points, not scoring rules")
+    # PB and NT bonuses come from the seed times only (the best-times index needs the vectorized engine)
+    # Initialize lists to store standardized data
+    standardized_data = []
+    current_event = None
+    reasons = dict.fromkeys(SKIP_REASONS, 0)
+
+    # Process the dataframe row by row
+    for index, row in df.iterrows():
+        # Check if the row contains an event name
+        if pd.notna(row[0]) and 'Event' in str(row[0]):
+            current_event = clean_event_header(row[0])
+            reasons['event_header'] += 1
+            continue
+        # Skip rows that are not swimmer results
+        if pd.isna(row[0]):
+            reasons['blank'] += 1
+            continue
+        if 'Name' in str(row[0]) or 'ADV' in str(row[1]) or 'DEV' in str(row[1]) or 'Team' in str(row[0]):
+            reasons['label'] += 1
+            continue
+        # Extract swimmer data
+        name = row[1] if pd.notna(row[1]) else None
+        age = row[2].strip() if pd.notna(row[2]) else None
+        team = row[3] if pd.notna(row[3]) else None
+        seed_time = row[4] if pd.notna(row[4]) else None
+        finals_time = row[7] if pd.notna(row[7]) else None
+        place_points = row[10] if pd.notna(row[10]) else 0
+        decimal_points = row[11] if pd.notna(row[11]) else 0 
+        rank = row[13] if pd.notna(row[13]) else None
+        qualification = row[9] if pd.notna(row[9]) else None
+
+        # Trigger DQ flag
+        dq = None
+        if "---" in str(rank):
+            dq = "DQ"
+
+        #Place points and decimal points handling
+        place_points = float(place_points) if place_points is not None and str(place_points).strip() else 0
+        place_points = float(place_points) + float(decimal_points) / 100 if pd.notna(decimal_points) else float(place_points) if place_points is not None else 0
+        
+        
+        # Skip if critical data is missing
+        if not name:
+            reasons['missing_name'] += 1
+            continue
+        if not current_event:
+            reasons['before_first_event'] += 1
+            continue
+        
+        # Swap name and Team name if Relay event
+        if 'Relay' in current_event:
+            if pd.notna(team):
+                name, team = team.strip(), name.strip()
+
+        # Parse event details
+        event_details = parse_event_name(current_event)
+        
+        # Convert times to seconds
+        seed_time_seconds = convert_time_to_seconds(seed_time)
+        finals_time_seconds = convert_time_to_seconds(finals_time)
+
+        # Calculate improvement
+        improvement = calculate_time_diff(seed_time_seconds, finals_time_seconds)
+
+        # Calculate time points
+        time_points = calculate_time_points(dq, qualification, current_event,bonus_points['DEV'], bonus_points['ADV'])
+
+        # Calculate pb points
+        pb_points = calculate_pb_points(seed_time, improvement, dq, current_event, bonus_points['NT'], bonus_points['PB'])
+
+        # Calculate total points
+        total_points = calculate_total_points(place_points, pb_points, time_points)
+        
+        # Create standardized record
+        record = {
+            'MeetName': meet_name,
+            'Date': meet_date,
+            'Event': current_event,
+            'Gender': event_details['Gender'],
+            'AgeGroup': event_details['AgeGroup'],
+            'Distance': event_details['Distance'],
+            'Stroke': event_details['Stroke'],
+            'Category': 'Individual' if 'Relay' not in current_event else 'Relay',
+            'SwimmerName': name,
+            'Age': age,
+            'Team': team,
+            'SeedTime': seed_time_seconds,
+            'FinalsTime': finals_time_seconds,
+            'Improvement': improvement,
+            'Rank': rank,
+            'DQ': dq is not None,
+            'Qualification': qualification,
+            'PlacePoints': place_points,
+            'PBPoints': pb_points,
+            'TimePoints': time_points,
+            'TotalPoints': total_points,
+        }
+        standardized_data.append(record)
+
+    report.count_skipped(skipped, reasons)
+
+    # Create a DataFrame from standardized data
+    standardized_df = pd.DataFrame(standardized_data, columns=STANDARDIZED_COLUMNS)
+    standardized_df['SwimmerID'] = identity.swimmer_ids(standardized_df['SwimmerName'], standardized_df['Team'], standardized_df['Category'] == 'Relay')
+    return schema.standardized(standardized_df)
+
+# Helper to render a column the way str() renders a single cell (NaN -> 'nan')
+def _as_text(series):
+    return series.map(str).astype(object)
+
+# Helper to evaluate the truthiness of each cell (null cells are falsy)
+def _truthy(series):
+    return series.map(bool, na_action='ignore').fillna(False).astype(bool)
+
+# Helper to flag the event header rows of a sheet (first column mentions the event)
+def _is_event_header(col0, col0_text=None):
+    if col0_text is None:
+        col0_text = _as_text(col0)
+    return col0.notna() & col0_text.str.contains('Event', regex=False)
+
+# Helper to store points the way calculate_*_points return them (None for zero)
+def _bonus_points(points):
+    return points.astype('Int16').where(points != 0)
+
+# Column-wise standardization of rows returned by read_workbook
+def standardize_frame(df, meet_name, meet_date, bonus_points, current_event=None, skipped=None, best_times_db=None, meet_order=None,
+                      identities_db=None):
+    # current_event is the event in force before the first row (used when streaming in chunks)
+    # skipped, when given, is a dict that receives the number of rows skipped per reason
+    # best_times_db, when given, is the best-times index that PB and NT bonuses are checked against,
+    # using the meets before meet_order (see best_times.py)
+    # identities_db, when given, is the identity registry SwimmerIDs are resolved against (see identity.py)
+    col0 = df[0]
+    col0_text = _as_text(col0)
+    col1_text = _as_text(df[1])
+
+    # Forward-fill event headers onto the rows below them
+    is_event = _is_event_header(col0, col0_text)
+    headers = col0.where(is_event).dropna().map(clean_event_header).reindex(df.index)
+    if current_event is not None and len(df) and not is_event.iloc[0]:
+        headers.iloc[0] = current_event
+    current_event = headers.ffill()
+
+    # Keep only swimmer result rows
+    is_label = (
+        col0.isna()
+        | col0_text.str.contains('Name', regex=False)
+        | col1_text.str.contains('ADV', regex=False)
+        | col1_text.str.contains('DEV', regex=False)
+        | col0_text.str.contains('Team', regex=False)
+    )
+    has_name = _truthy(df[1])
+    has_event = _truthy(current_event)
+    rows = df[~is_event & ~is_label & has_name & has_event]
+    event = current_event[rows.index]
+    report.count_skipped(skipped, {
+        'event_header': is_event.sum(),
+        'blank': (~is_event & col0.isna()).sum(),
+        'label': (~is_event & is_label & col0.notna()).sum(),
+        'missing_name': (~is_event & ~is_label & ~has_name).sum(),
+        'before_first_event': (~is_event & ~is_label & has_name & ~has_event).sum(),
+    })
+
+    if rows.empty:
+        return schema.standardized(pd.DataFrame(columns=STANDARDIZED_COLUMNS))
+
+    name = rows[1]
+    age = rows[2].map(lambda value: value.strip(), na_action='ignore')
+    team = rows[3]
+    seed_time = rows[4]
+    finals_time = rows[7]
+    qualification = rows[9]
+    rank = rows[13]
+
+    # Place points and decimal points handling
+    place_points = pd.to_numeric(rows[10], errors='coerce').fillna(0).astype(float)
+    decimal_points = pd.to_numeric(rows[11], errors='coerce').fillna(0).astype(float)
+    place_points = place_points + decimal_points / 100
+
+    # Swap name and Team name if Relay event
+    has_relay = event.str.contains('Relay', regex=False)
+    swap = has_relay & team.notna()
+    swapped_name = team.where(swap).map(lambda value: value.strip(), na_action='ignore')
+    swapped_team = name.where(swap).map(lambda value: value.strip(), na_action='ignore')
+    name = name.where(~swap, swapped_name)
+    team = team.where(~swap, swapped_team)
+
+    # Parse event details once per distinct event
+    event_details = pd.DataFrame(
+        [parse_event_name(value) for value in event.unique()],
+        index=event.unique(),
+    ).reindex(event).set_axis(rows.index)
+
+    # Convert times to seconds and calculate improvement
+    seed_time_seconds = times.times_to_seconds(seed_time)
+    finals_time_seconds = times.times_to_seconds(finals_time)
+    improvement = times.time_improvements(seed_time_seconds, finals_time_seconds)
+
+    # DQ flag
+    is_dq = _as_text(rank).str.contains('---', regex=False)
+
+    # A swim is a PB if it beats the seed time, and with the best-times index also the swimmer's earlier
+    # best; the NT bonus only applies when there is neither
+    no_seed = ~_truthy(seed_time) | _as_text(seed_time).str.upper().str.contains('NT', regex=False)
+    improved = (improvement < 0).fillna(False)
+    if best_times_db:
+        previous_best = best_times.previous_bests(best_times_db, _best_time_keys(name, event_details), meet_order)
+        no_seed &= previous_best.isna()
+        improved = finals_time_seconds < pd.concat([seed_time_seconds, previous_best], axis=1).min(axis=1)
+
+    # Calculate time, pb and total points with the scoring rules (bonus_points may be a rules config)
+    points = scoring.score(bonus_points, pd.DataFrame({
+        'NoSeed': no_seed,
+        'Improved': improved,
+        'DQ': is_dq,
+        'Relay': event.str.upper().str.contains('RELAY', regex=False),
+        'Qualification': _as_text(qualification),
+        'Event': event,
+        'AgeGroup': event_details['AgeGroup'],
+        'Gender': event_details['Gender'],
+        'Stroke': event_details['Stroke'],
+        'Distance': event_details['Distance'],
+        'PlacePoints': place_points,
+    }))
+
+    standardized_df = pd.DataFrame({
+        'MeetName': meet_name,
+        'Date': meet_date,
+        'Event': event,
+        'Gender': event_details['Gender'],
+        'AgeGroup': event_details['AgeGroup'],
+        'Distance': event_details['Distance'],
+        'Stroke': event_details['Stroke'],
+        'Category': has_relay.map({True: 'Relay', False: 'Individual'}),
+        'SwimmerName': name,
+        'Age': age,
+        'Team': team,
+        'SeedTime': seed_time_seconds,
+        'FinalsTime': finals_time_seconds,
+        'Improvement': improvement,
+        'Rank': rank,
+        'DQ': is_dq,
+        'Qualification': qualification,
+        'PlacePoints': points['PlacePoints'],
+        'PBPoints': _bonus_points(points['PBPoints']),
+        'TimePoints': _bonus_points(points['TimePoints']),
+        'TotalPoints': points['TotalPoints'],
+        'SwimmerID': identity.swimmer_ids(name, team, has_relay, identities_db, identity.birth_years(age, meet_date) if identities_db else None),
+    }, columns=STANDARDIZED_COLUMNS)
+    return schema.standardized(standardized_df).reset_index(drop=True)
+
+# Fewest rows in an event segment worth handing to another process
+SEGMENT_MIN_ROWS = 5000
+
+# Function to index the event header rows of a sheet and split it into event segments
+def event_segments(df, parts):
+    """Split the rows of a sheet into at most parts (start, stop) row ranges.
+
+    Ranges are cut at event header rows, so each range but the first starts
+    with the header of its first event and can be standardized on its own.
+    Cuts are placed at the first header after each even share of the rows, so
+    ranges are roughly the same size; a sheet with fewer events gives fewer ranges.
+    """
+    starts = _is_event_header(df[0]).to_numpy().nonzero()[0]
+    targets = [len(df) * part // parts for part in range(1, parts)]
+    cuts = {int(starts[i]) for i in starts.searchsorted(targets) if i < len(starts)}
+    bounds = sorted(cuts | {0, len(df)})
+    return list(zip(bounds[:-1], bounds[1:]))
+
+# Function to standardize one event segment in a batch worker
+def _standardize_segment_task(segment, meet_name, meet_date, bonus_points, best_times_db=None, meet_order=None, event_patterns=None):
+    if event_patterns:
+        events.load_event_patterns(event_patterns)
+    skipped = {}
+    standardized_df = standardize_frame(segment, meet_name, meet_date, bonus_points, skipped=skipped, best_times_db=best_times_db,
+                                        meet_order=meet_order)
+    return standardized_df, skipped
+
+# Function to standardize the event segments of a large sheet concurrently
+def standardize_segments(df, meet_name, meet_date, bonus_points, workers=1, skipped=None, best_times_db=None, meet_order=None,
+                         identities_db=None, event_patterns=None):
+    """Standardize a sheet like standardize_frame, spreading its events over worker processes.
+
+    The sheet is split into event segments (see event_segments), at most one
+    per worker and none smaller than SEGMENT_MIN_ROWS, which are standardized
+    concurrently and put back together in their original order. Smaller sheets,
+    or workers of 1, are standardized in this process. event_patterns is loaded
+    in the workers so they parse event names the same way.
+    """
+    parts = min(workers, len(df) // SEGMENT_MIN_ROWS)
+    segments = event_segments(df, parts) if parts > 1 else []
+    if len(segments) <= 1:
+        return standardize_frame(df, meet_name, meet_date, bonus_points, skipped=skipped, best_times_db=best_times_db, meet_order=meet_order,
+                                 identities_db=identities_db)
+
+    logger.info(f"Standardizing {len(df)} rows in {len(segments)} event segments with {workers} workers")
+    tasks = [
+        functools.partial(_standardize_segment_task, df.iloc[start:stop], meet_name, meet_date, bonus_points,
+                          best_times_db=best_times_db, meet_order=meet_order, event_patterns=event_patterns)
+        for start, stop in segments
+    ]
+    frames = []
+    for result, error in batch.run_batch(tasks, workers):
+        if error is not None:
+            raise error
+        segment_df, segment_skipped = result
+        report.count_skipped(skipped, segment_skipped)
+        if not segment_df.empty:
+            frames.append(segment_df)
+    if not frames:
+        return schema.standardized(pd.DataFrame(columns=STANDARDIZED_COLUMNS))
+    standardized_df = pd.concat(frames, ignore_index=True)
+    if identities_db:
+        # Resolve the registry once for the whole meet, so matches do not depend on how the sheet was split
+        standardized_df['SwimmerID'] = identity.swimmer_ids(standardized_df['SwimmerName'], standardized_df['Team'],
+                                                            standardized_df['Category'] == 'Relay', identities_db,
+                                                            identity.birth_years(standardized_df['Age'], standardized_df['Date']))
+    return schema.standardized(standardized_df)
+
+# Helper to build the best-times keys of swims from their names and parsed events
+def _best_time_keys(name, event_details):
+    return best_times.swim_keys(pd.DataFrame({
+        'SwimmerName': name,
+        'Distance': event_details['Distance'],
+        'Stroke': event_details['Stroke'],
+        'Course': event_details['Course'],
+    }))
+
+# Function to add the individual swims of a standardized frame to the best-times index
+def record_best_times(standardized_df, best_times_db, file_path, replace=True):
+    swims = standardized_df[
+        (standardized_df['Category'] == 'Individual') & ~standardized_df['DQ'].fillna(False).astype(bool)
+        & standardized_df['FinalsTime'].notna()
+    ]
+    event = swims['Event'].astype(object)
+    event_details = pd.DataFrame(
+        [parse_event_name(value) for value in event.unique()],
+        index=event.unique(), columns=['Distance', 'Stroke', 'Course'],
+    ).reindex(event).set_axis(swims.index)
+    # Times are stored as float32; round them back to hundredths
+    return best_times.record_times(
+        best_times_db, os.path.basename(file_path), best_times.meet_order(file_path),
+        _best_time_keys(swims['SwimmerName'], event_details), swims['FinalsTime'].astype(float).round(2), replace=replace,
+    )
+
+# Function to build the standardized file name for an input file
+def standardized_filename(file_path, output_format='csv'):
+    return f"standardized_{os.path.splitext(os.path.basename(file_path))[0]}{formats.EXTENSIONS[output_format]}"
+
 # Function to process a single Excel file
-def process_file(file_path, output_dir, bonus_points):
+def process_file(file_path, output_dir, bonus_points, engine='vectorized', file_report=None, output_format='csv', background=False,
+                 best_times_db=None, identities_db=None, segment_workers=1, event_patterns=None):
+    # file_report, when given, receives stage timings, row counts and outputs (see report.py)
+    # With background, the output is written on the writer thread (see formats.write_frame)
+    # With best_times_db, PBs are checked against and added to that best-times index
+    # With identities_db, SwimmerIDs are resolved against and added to that identity registry
+    # With segment_workers, a large sheet is split into event segments standardized in that many processes
+    # (see standardize_segments); event_patterns is the event patterns file those processes load
     try:
         logger.info(f"Processing file: {file_path}")
-        # Extract meet info
-        meet_name, meet_date = extract_meet_info(file_path)
-        
+        if (best_times_db or identities_db) and engine == 'rowwise':
+            raise ValueError("The best-times index and identity registry need the vectorized engine")
         # Load the Excel file
-        df = pd.read_excel(file_path)
-        
-        # Initialize lists to store standardized data
-        standardized_data = []
-        current_event = None
+        with report.stage(file_report, 'read_workbook') as stage:
+            title, df = read_workbook(file_path)
+            report.count_rows(stage, rows_out=len(df))
+
+        # Extract meet info
+        with report.stage(file_report, 'extract_meet_info'):
+            meet_name, meet_date = extract_meet_info(file_path, title)
         
-        # Process the dataframe row by row
-        for index, row in df.iterrows():
-            # Check if the row contains an event name
-            if pd.notna(row.iloc[0]) and 'Event' in str(row.iloc[0]):
-                current_event = row.iloc[0].strip()
-                index = current_event.find("  ")
-                current_event = str(current_event[index+1:]).strip()
-                current_event = str(current_event).replace(')', '') if ")" in current_event else current_event
-                continue
-            # Skip rows that are not swimmer results
-            if pd.isna(row.iloc[0]) or 'Name' in str(row.iloc[0]) or 'ADV' in str(row.iloc[1]) or 'DEV' in str(row.iloc[1]) or 'Team' in str(row.iloc[0]):
-                continue
-            # Extract swimmer data
-            name = row.iloc[1] if pd.notna(row.iloc[1]) else None
-            age = row.iloc[2].strip() if pd.notna(row.iloc[2]) else None
-            team = row.iloc[3] if pd.notna(row.iloc[3]) else None
-            seed_time = row.iloc[4] if pd.notna(row.iloc[4]) else None
-            finals_time = row.iloc[7] if pd.notna(row.iloc[7]) else None
-            place_points = row.iloc[10] if pd.notna(row.iloc[10]) else 0
-            decimal_points = row.iloc[11] if pd.notna(row.iloc[11]) else 0 
-            rank = row.iloc[13] if pd.notna(row.iloc[13]) else None
-            qualification = row.iloc[9] if pd.notna(row.iloc[9]) else None
-
-            # Trigger DQ flag
-            dq = None
-            if "---" in str(rank):
-                dq = "DQ"
-
-            #Place points and decimal points handling
-            place_points = float(place_points) if place_points is not None and str(place_points).strip() else 0
-            place_points = float(place_points) + float(decimal_points) / 100 if pd.notna(decimal_points) else float(place_points) if place_points is not None else 0
-            
-            
-            # Skip if critical data is missing
-            if not name or not current_event:
-                continue
-            
-            # Swap name and Team name if Relay event
-            if 'Relay' in current_event:
-                if pd.notna(team):
-                    name, team = team.strip(), name.strip()
-
-            # Parse event details
-            event_details = parse_event_name(current_event)
-            
-            # Convert times to seconds
-            seed_time_seconds = convert_time_to_seconds(seed_time)
-            finals_time_seconds = convert_time_to_seconds(finals_time)
-
-            # Calculate improvement
-            improvement = calculate_time_diff(seed_time_seconds, finals_time_seconds)
-
-            # Calculate time points
-            time_points = calculate_time_points(dq, qualification, current_event,bonus_points['DEV'], bonus_points['ADV'])
-
-            # Calculate pb points
-            pb_points = calculate_pb_points(seed_time, improvement, dq, current_event, bonus_points['NT'], bonus_points['PB'])
-
-            # Calculate total points
-            total_points = calculate_total_points(place_points, pb_points, time_points)
-            
-            # Create standardized record
-            record = {
-                'MeetName': meet_name,
-                'Date': meet_date,
-                'Event': current_event,
-                'Gender': event_details['Gender'],
-                'AgeGroup': event_details['AgeGroup'],
-                'Distance': event_details['Distance'],
-                'Stroke': event_details['Stroke'],
-                'Category': 'Individual' if 'Relay' not in current_event else 'Relay',
-                'SwimmerName': name,
-                'Age': age,
-                'Team': team,
-                'SeedTime': seed_time_seconds,
-                'FinalsTime': finals_time_seconds,
-                'Improvement': improvement,
-                'Rank': rank,
-                'DQ': dq,
-                'Qualification': qualification,
-                'PlacePoints': place_points,
-                'PBPoints': pb_points,
-                'TimePoints': time_points,
-                'TotalPoints': total_points,
-            }
-            standardized_data.append(record)
+        # Standardize the rows with the selected engine
+        with report.stage(file_report, 'standardize') as stage:
+            if engine == 'rowwise':
+                standardized_df = standardize_rows(df, meet_name, meet_date, bonus_points, skipped=stage.setdefault('skipped', {}))
+            else:
+                standardized_df = standardize_segments(df, meet_name, meet_date, bonus_points, segment_workers, skipped=stage.setdefault('skipped', {}),
+                                                       best_times_db=best_times_db, meet_order=best_times.meet_order(file_path),
+                                                       identities_db=identities_db, event_patterns=event_patterns)
+            report.count_rows(stage, rows_in=len(df), rows_out=len(standardized_df))
+
+        # Add this meet's times to the best-times index
+        if best_times_db:
+            with report.stage(file_report, 'best_times') as stage:
+                record_best_times(standardized_df, best_times_db, file_path)
+                report.count_rows(stage, rows_in=len(standardized_df))
         
-        # Create a DataFrame from standardized data
-        standardized_df = pd.DataFrame(standardized_data)
-        
-        # Save to CSV
-        output_file = os.path.join(output_dir, f"standardized_{os.path.splitext(os.path.basename(file_path))[0]}.csv")
-        standardized_df.to_csv(output_file, index=False)
-        logger.info(f"Standardized data saved to {output_file}")
+        # Save the output (unless the data is only handed over in memory)
+        if output_dir is not None:
+            output_file = os.path.join(output_dir, standardized_filename(file_path, output_format))
+            with report.stage(file_report, 'write_standardized') as stage:
+                formats.write_frame(standardized_df, output_file, output_format, standardized=True, background=background)
+                report.count_rows(stage, rows_in=len(standardized_df))
+            report.record_output(file_report, 'standardized', output_file, 'write_standardized')
+            logger.info(f"Standardized data {'queued for' if background else 'saved to'} {output_file}")
         
         # Return the DataFrame for potential further use
         return standardized_df
@@ -251,31 +653,140 @@ def process_file(file_path, output_dir, bonus_points):
         logger.error(f"Error processing file {file_path}: {e}")
         return None
 
+# Function to process a single Excel file in bounded memory, writing the output chunk by chunk
+def stream_file(file_path, output_dir, bonus_points, chunk_size=10000, file_report=None, output_format='csv', best_times_db=None,
+                identities_db=None):
+    # Only formats in formats.APPENDABLE_FORMATS can be written chunk by chunk
+    try:
+        logger.info(f"Streaming file: {file_path}")
+        if output_format not in formats.APPENDABLE_FORMATS:
+            raise ValueError(f"Streaming writes {' or '.join(formats.APPENDABLE_FORMATS)}, not {output_format}")
+        output_file = os.path.join(output_dir, standardized_filename(file_path, output_format))
+        meet_name = meet_date = None
+        chunks = iter_workbook_chunks(file_path, chunk_size)
+        while True:
+            # Reading is timed per chunk, as it is interleaved with the other stages
+            with report.stage(file_report, 'read_workbook') as stage:
+                item = next(chunks, None)
+                if item is not None:
+                    report.count_rows(stage, rows_out=len(item[1]))
+            if item is None:
+                break
+            title, chunk, current_event = item
+            first_chunk = meet_name is None
+            if first_chunk:
+                # Extract meet info once the title row has been read
+                with report.stage(file_report, 'extract_meet_info'):
+                    meet_name, meet_date = extract_meet_info(file_path, title)
+            with report.stage(file_report, 'standardize') as stage:
+                standardized_df = standardize_frame(chunk, meet_name, meet_date, bonus_points, current_event=current_event, skipped=stage.setdefault('skipped', {}),
+                                                    best_times_db=best_times_db, meet_order=best_times.meet_order(file_path),
+                                                    identities_db=identities_db)
+                report.count_rows(stage, rows_in=len(chunk), rows_out=len(standardized_df))
+            if best_times_db:
+                with report.stage(file_report, 'best_times') as stage:
+                    record_best_times(standardized_df, best_times_db, file_path, replace=first_chunk)
+                    report.count_rows(stage, rows_in=len(standardized_df))
+            with report.stage(file_report, 'write_standardized') as stage:
+                formats.write_frame(standardized_df, output_file, output_format, standardized=True, append=not first_chunk)
+                report.count_rows(stage, rows_in=len(standardized_df))
+        report.record_output(file_report, 'standardized', output_file)
+        logger.info(f"Standardized data saved to {output_file}")
+        return output_file
+    except Exception as e:
+        logger.error(f"Error processing file {file_path}: {e}")
+        return None
+
+# Function to process a single Excel file in a batch worker
+def _process_file_task(file_path, output_dir, bonus_points, engine, event_patterns=None, chunk_size=None, output_format='csv', background=False,
+                       best_times_db=None, identities_db=None, segment_workers=1):
+    if event_patterns:
+        events.load_event_patterns(event_patterns)
+    if chunk_size:
+        return stream_file(file_path, output_dir, bonus_points, chunk_size, output_format=output_format, best_times_db=best_times_db,
+                           identities_db=identities_db) is not None
+    # Only report success so the DataFrame does not travel back from the worker
+    return process_file(file_path, output_dir, bonus_points, engine=engine, output_format=output_format, background=background,
+                        best_times_db=best_times_db, identities_db=identities_db, segment_workers=segment_workers,
+                        event_patterns=event_patterns) is not None
+
 # Main function to process multiple files
 def main(args):
     input_dir = args.input_dir
     output_dir = args.output_dir
     bonus_points = args.bonus_points
+    if getattr(args, 'scoring_rules', None):
+        bonus_points = scoring.load_rules(args.scoring_rules)
+    engine = getattr(args, 'engine', 'vectorized')
+    workers = getattr(args, 'workers', 1)
+    event_patterns = getattr(args, 'event_patterns', None)
+    chunk_size = getattr(args, 'chunk_size', 10000) if getattr(args, 'streaming', False) else None
+    output_format = getattr(args, 'output_format', 'csv')
+    try:
+        formats.check_format(output_format)
+    except ValueError as e:
+        logger.error(f"{e}. Exiting.")
+        return []
+    if chunk_size and output_format not in formats.APPENDABLE_FORMATS:
+        logger.error(f"Streaming writes {' or '.join(formats.APPENDABLE_FORMATS)}, not {output_format}. Exiting.")
+        return []
+    best_times_db = getattr(args, 'best_times', None)
+    identities_db = getattr(args, 'identities', None)
+    if best_times_db and workers > 1:
+        # Each meet's PBs depend on the meets before it, so they are processed one at a time
+        logger.warning("The best-times index is updated meet by meet; processing files with 1 worker.")
+        workers = 1
+    # Without worker processes, each file is written in the background while the next one is read
+    background = workers <= 1
     
     # Create output directory if it doesn't exist
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
         logger.info(f"Created output directory: {output_dir}")
     
-    # Process all Excel files in the input directory
-    excel_files = [f for f in os.listdir(input_dir) if f.endswith(('.xls', '.xlsx'))]
+    # Process all Excel files in the input directory (or zip/tar archive)
+    excel_files = archives.list_workbooks(input_dir)
     if not excel_files:
         logger.warning(f"No Excel files found in {input_dir}")
-        return
+        return []
+    if best_times_db:
+        # Earlier meets go first, so their times count as history for later ones
+        excel_files.sort(key=best_times.meet_order)
+    # When files are processed one at a time, the workers standardize the events of each large file instead
+    segment_workers = getattr(args, 'workers', 1) if workers <= 1 or len(excel_files) == 1 else 1
     
-    for file_name in excel_files:
-        file_path = os.path.join(input_dir, file_name)
-        process_file(file_path, output_dir, bonus_points)
+    options = dict(engine=engine, event_patterns=event_patterns, chunk_size=chunk_size, output_format=output_format, background=background,
+                   best_times_db=best_times_db, identities_db=identities_db, segment_workers=segment_workers)
+    tasks = [functools.partial(_process_file_task, os.path.join(input_dir, file_name), output_dir, bonus_points, **options)
+             for file_name in excel_files]
+    outcomes = batch.run_batch(tasks, workers)
+    failed_writes = formats.wait_for_writes()
+
+    # Collect results and errors per file
+    results = []
+    for file_name, (succeeded, error) in zip(excel_files, outcomes):
+        if error is not None:
+            logger.error(f"Error processing file {file_name}: {error}")
+        output_file = os.path.join(output_dir, standardized_filename(file_name, output_format))
+        results.append((file_name, bool(succeeded) and output_file not in failed_writes))
+    failed = [file_name for file_name, succeeded in results if not succeeded]
+    if failed:
+        logger.error(f"Standardization failed for {len(failed)} of {len(results)} files: {', '.join(failed)}")
+    return results
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Standardize swim meet result Excel files")
-    parser.add_argument('--input-dir', default='results', help='Directory containing Excel files')
-    parser.add_argument('--output-dir', default='standardized_results', help='Directory to save standardized CSV files')
+    parser.add_argument('--input-dir', default='results', help='Directory (or zip/tar archive) containing Excel files')
+    parser.add_argument('--output-dir', default='standardized_results', help='Directory to save standardized files')
+    parser.add_argument('--output-format', choices=formats.OUTPUT_FORMATS, default='csv', help='Format of the standardized files (parquet and feather need pyarrow)')
     parser.add_argument('--bonus-points', default={"DEV": "3", "ADV": "6", "NT": "1", "PB": "2"}, help='Calculate bonus points')
+    parser.add_argument('--scoring-rules', help='JSON file of scoring rules used instead of the bonus points')
+    parser.add_argument('--engine', choices=ENGINES, default='vectorized', help='Standardization engine (rowwise is the original row-by-row loop)')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes used to process files in parallel')
+    parser.add_argument('--event-patterns', help='JSON file with extra gender, course and stroke patterns for event names')
+    parser.add_argument('--best-times', help='Best-times index (SQLite) that PB and NT bonuses are checked against; each meet is added to it')
+    parser.add_argument('--identities', help='Identity registry (SQLite) that keeps SwimmerIDs stable across meets and matches spelling variants within a team')
+    parser.add_argument('--streaming', action='store_true', help='Stream each workbook row by row and write the output (CSV or JSONL) in chunks, keeping memory flat for very large files')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='Rows per chunk in streaming mode')
     args = parser.parse_args()
     main(args)
\ No newline at end of file
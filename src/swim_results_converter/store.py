@@ -0,0 +1,215 @@
+import argparse
+import csv
+import json
+import logging
+import math
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Standardized columns stored per result, with their SQLite types
+RESULT_COLUMNS = [
+    ('MeetName', 'TEXT'), ('Date', 'TEXT'), ('Event', 'TEXT'), ('Gender', 'TEXT'), ('AgeGroup', 'TEXT'),
+    ('Distance', 'TEXT'), ('Stroke', 'TEXT'), ('Category', 'TEXT'), ('SwimmerName', 'TEXT'), ('Age', 'TEXT'),
+    ('Team', 'TEXT'), ('SeedTime', 'REAL'), ('FinalsTime', 'REAL'), ('Improvement', 'REAL'), ('Rank', 'TEXT'),
+    ('DQ', 'INTEGER'), ('Qualification', 'TEXT'), ('PlacePoints', 'REAL'), ('PBPoints', 'INTEGER'),
+    ('TimePoints', 'INTEGER'), ('TotalPoints', 'REAL'), ('SwimmerID', 'TEXT'),
+]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS meets (
+    SourceFile TEXT PRIMARY KEY,
+    FileHash TEXT NOT NULL,
+    BonusPoints TEXT NOT NULL,
+    MeetName TEXT,
+    Date TEXT,
+    Results INTEGER NOT NULL,
+    ImportedAt TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    SourceFile TEXT NOT NULL REFERENCES meets(SourceFile) ON DELETE CASCADE,
+    RowNumber INTEGER NOT NULL,
+    {', '.join(f'{name} {sql_type}' for name, sql_type in RESULT_COLUMNS)},
+    PRIMARY KEY (SourceFile, RowNumber)
+);
+CREATE INDEX IF NOT EXISTS results_swimmer_event ON results (SwimmerName, Event);
+CREATE INDEX IF NOT EXISTS results_team_meet ON results (Team, MeetName);
+CREATE INDEX IF NOT EXISTS results_meet_date ON results (MeetName, Date);
+"""
+
+# Index created once older databases have the SwimmerID column (see _add_swimmer_ids)
+SWIMMER_ID_INDEX = 'CREATE INDEX IF NOT EXISTS results_swimmer_id ON results (SwimmerID, Event)'
+
+# Function to open (and if needed create) a results database
+def connect(db_file, timeout=30.0):
+    # The timeout lets several worker processes take turns writing
+    connection = sqlite3.connect(db_file, timeout=timeout)
+    connection.execute('PRAGMA foreign_keys = ON')
+    connection.executescript(SCHEMA)
+    _add_swimmer_ids(connection)
+    connection.execute(SWIMMER_ID_INDEX)
+    return connection
+
+# Function to add the SwimmerID column to a database created before SwimmerIDs
+def _add_swimmer_ids(connection):
+    columns = {row[1] for row in connection.execute('PRAGMA table_info(results)')}
+    if 'SwimmerID' in columns:
+        return
+    # identity needs pandas, so it is only imported when an older database is upgraded
+    try:
+        from . import identity
+    except ImportError:
+        import identity
+    rows = connection.execute('SELECT SourceFile, RowNumber, SwimmerName, Team, Category FROM results').fetchall()
+    names = [row[2] for row in rows]
+    teams = [row[3] for row in rows]
+    relay = [row[4] == 'Relay' for row in rows]
+    # Stored results get the IDs computed from their names (as for standardized files without SwimmerIDs)
+    swimmer_ids = identity.swimmer_ids(names, teams, relay).tolist() if rows else []
+    with connection:
+        connection.execute('ALTER TABLE results ADD COLUMN SwimmerID TEXT')
+        connection.executemany(
+            'UPDATE results SET SwimmerID = ? WHERE SourceFile = ? AND RowNumber = ?',
+            [(None if swimmer_id is None or swimmer_id != swimmer_id else swimmer_id, row[0], row[1]) for swimmer_id, row in zip(swimmer_ids, rows)],
+        )
+    logger.info(f"Added SwimmerIDs to {len(rows)} stored results")
+
+# Function to turn a column into SQLite values (None for missing values)
+def _column_values(series):
+    if series.dtype.kind == 'f':
+        # Round float32 times and points so 65.43 is not stored as 65.4300003
+        values = series.astype('float64').round(2).tolist()
+        return [None if math.isnan(value) else value for value in values]
+    return series.astype(object).where(series.notna(), None).tolist()
+
+# Function to store the standardized results of one input file
+def store_results(db_file, source_file, file_hash, bonus_points, frames):
+    """Insert the standardized results of an input file into the database.
+
+    frames is an iterable of standardized DataFrames (e.g. the chunks of a
+    streamed file). The file is keyed by its name. If the same content was
+    already stored with the same bonus points nothing is written; otherwise its
+    previous results are replaced in one transaction, so re-importing a file
+    never duplicates rows. Returns True when rows were written.
+    """
+    source_file = os.path.basename(source_file)
+    bonus_text = json.dumps(bonus_points, sort_keys=True)
+    connection = connect(db_file)
+    try:
+        stored = connection.execute(
+            'SELECT FileHash, BonusPoints FROM meets WHERE SourceFile = ?', (source_file,)
+        ).fetchone()
+        if stored == (file_hash, bonus_text):
+            logger.info(f"{source_file} is already in {db_file}")
+            return False
+
+        columns = [name for name, sql_type in RESULT_COLUMNS]
+        insert = (
+            f"INSERT INTO results (SourceFile, RowNumber, {', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * (len(columns) + 2))})"
+        )
+        with connection:
+            connection.execute('DELETE FROM results WHERE SourceFile = ?', (source_file,))
+            connection.execute(
+                'INSERT INTO meets (SourceFile, FileHash, BonusPoints, Results, ImportedAt) VALUES (?, ?, ?, 0, ?) '
+                'ON CONFLICT (SourceFile) DO UPDATE SET FileHash = excluded.FileHash, BonusPoints = excluded.BonusPoints, '
+                'Results = 0, ImportedAt = excluded.ImportedAt',
+                (source_file, file_hash, bonus_text, datetime.now().isoformat(timespec='seconds')),
+            )
+            count = 0
+            for df in frames:
+                values = [_column_values(df[name]) if name in df.columns else [None] * len(df) for name in columns]
+                connection.executemany(insert, [(source_file, count + number) + row for number, row in enumerate(zip(*values))])
+                count += len(df)
+            connection.execute(
+                'UPDATE meets SET Results = ?, '
+                'MeetName = (SELECT MeetName FROM results WHERE SourceFile = ? LIMIT 1), '
+                'Date = (SELECT Date FROM results WHERE SourceFile = ? LIMIT 1) '
+                'WHERE SourceFile = ?',
+                (count, source_file, source_file, source_file),
+            )
+        logger.info(f"Stored {count} results from {source_file} in {db_file}")
+        return True
+    finally:
+        connection.close()
+
+# Queries behind the command-line lookups
+QUERIES = {
+    # Swimmers are looked up by name or SwimmerID, and every spelling with the same SwimmerID is included
+    'swimmer': (
+        'SELECT MeetName, Date, Event, SwimmerName, Age, Team, SeedTime, FinalsTime, Improvement, Rank, DQ, Qualification, TotalPoints, SwimmerID '
+        'FROM results WHERE SwimmerName = ?1 '
+        'OR SwimmerID IN (SELECT SwimmerID FROM results WHERE SwimmerName = ?1 OR SwimmerID = ?1) ORDER BY Date, MeetName, Event'
+    ),
+    'event': (
+        'SELECT SwimmerName, MeetName, Date, Team, SeedTime, FinalsTime, Rank, DQ, TotalPoints, SwimmerID '
+        'FROM results WHERE Event = ?2 AND (SwimmerName = ?1 '
+        'OR SwimmerID IN (SELECT SwimmerID FROM results WHERE SwimmerName = ?1 OR SwimmerID = ?1)) ORDER BY Date, MeetName'
+    ),
+    'team': (
+        'SELECT MeetName, Date, Event, SwimmerName, Age, FinalsTime, Rank, DQ, TotalPoints '
+        'FROM results WHERE Team = ? ORDER BY MeetName, Event, SwimmerName'
+    ),
+    'team-meet': (
+        'SELECT Date, Event, SwimmerName, Age, FinalsTime, Rank, DQ, TotalPoints '
+        'FROM results WHERE Team = ? AND MeetName = ? ORDER BY Event, SwimmerName'
+    ),
+    'meet': (
+        'SELECT Team, COUNT(*) AS Results, COUNT(DISTINCT SwimmerName) AS Swimmers, SUM(TotalPoints) AS TotalPoints '
+        'FROM results WHERE MeetName = ? GROUP BY Team ORDER BY TotalPoints DESC'
+    ),
+    'meets': 'SELECT MeetName, Date, SourceFile, Results, ImportedAt FROM meets ORDER BY Date, MeetName',
+}
+
+# Function to run one of the lookups and return the column names and rows
+def query(db_file, lookup, *params):
+    connection = connect(db_file)
+    try:
+        cursor = connection.execute(QUERIES[lookup], params)
+        return [column[0] for column in cursor.description], cursor.fetchall()
+    finally:
+        connection.close()
+
+# Main function
+def main(args):
+    if not os.path.exists(args.database):
+        logger.error(f"Database not found: {args.database}")
+        sys.exit(1)
+    if args.lookup in ('swimmer', 'team', 'meet'):
+        params = (args.name,)
+    elif args.lookup == 'event':
+        params = (args.name, args.event)
+    elif args.lookup == 'team-meet':
+        params = (args.name, args.meet)
+    else:
+        params = ()
+    columns, rows = query(args.database, args.lookup, *params)
+    writer = csv.writer(sys.stdout)
+    writer.writerow(columns)
+    writer.writerows(rows)
+    return rows
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Look up swimmer, team and meet history in a results database (output is CSV)")
+    parser.add_argument('--database', required=True, help='SQLite database written by swim-results-converter --database')
+    lookups = parser.add_subparsers(dest='lookup', required=True)
+    lookups.add_parser('meets', help='List the imported meets')
+    swimmer = lookups.add_parser('swimmer', help='All results of a swimmer')
+    swimmer.add_argument('name', help='Swimmer name as in the results, e.g. "Brown, Aroha D", or SwimmerID')
+    event = lookups.add_parser('event', help='Results of a swimmer in one event across meets')
+    event.add_argument('name', help='Swimmer name or SwimmerID')
+    event.add_argument('event', help='Event name, e.g. "Girls 9-10 50 SC Meter Freestyle"')
+    team = lookups.add_parser('team', help='All results of a team')
+    team.add_argument('name', help='Team name')
+    team_meet = lookups.add_parser('team-meet', help='Results of a team at one meet')
+    team_meet.add_argument('name', help='Team name')
+    team_meet.add_argument('meet', help='Meet name')
+    meet = lookups.add_parser('meet', help='Team totals at a meet')
+    meet.add_argument('name', help='Meet name')
+    args = parser.parse_args()
+    main(args)
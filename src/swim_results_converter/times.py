@@ -0,0 +1,93 @@
+import logging
+
+import pandas as pd
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Status values reported for each parsed time
+TIME_STATUSES = ('OK', 'NT', 'DQ', 'DNF', 'INVALID')
+
+# Function to parse a column of swim times
+def parse_times(times):
+    """Parse raw swim times into seconds and a status, one whole column at a time.
+
+    Accepts "MM:SS.SS", "SS.SS", "H:MM:SS.SS", numbers, Excel time cells
+    (datetime.time / timedelta), "NT", "DNF" and DQ markers such as "DQ" or
+    "DQ 3:49.50" (the time after the marker is kept). Returns a DataFrame with
+    a float Seconds column (rounded to hundredths, NaN when there is no time)
+    and a Status column (one of TIME_STATUSES, NaN for blank cells).
+    """
+    times = pd.Series(times, dtype=object) if not isinstance(times, pd.Series) else times
+    present = times.notna()
+    # Excel time cells render as "H:MM:SS.ffffff", so everything can be parsed as text
+    text = times.astype(str).where(present)
+    flags = text.str.strip().str.upper()
+
+    # Handle DQ cases (e.g., "DQ 3:49.50")
+    body = text.str.replace('DQ', '', regex=False).str.strip()
+    parts = body.str.split(':', expand=True)
+    parts = parts.reindex(columns=range(max(parts.shape[1], 3)))
+    part_count = parts.notna().sum(axis=1)
+    numbers = parts.iloc[:, :3].apply(pd.to_numeric, errors='coerce')
+    seconds = numbers[0].where(part_count == 1)
+    seconds = seconds.where(part_count != 2, numbers[0] * 60 + numbers[1])
+    seconds = seconds.where(part_count != 3, numbers[0] * 3600 + numbers[1] * 60 + numbers[2])
+    seconds = seconds.astype(float).where(present & (flags != 'NT')).round(2)
+
+    status = pd.Series('OK', index=times.index, dtype=object)
+    status = status.where(seconds.notna(), 'INVALID')
+    status = status.where(flags != 'NT', 'NT')
+    status = status.where(~flags.str.contains('DNF', regex=False, na=False), 'DNF')
+    status = status.where(~flags.str.contains('DQ', regex=False, na=False), 'DQ')
+    status = status.where(present)
+
+    invalid = text[status == 'INVALID']
+    if not invalid.empty:
+        logger.error(f"Error converting {len(invalid)} times, e.g. {invalid.unique()[:5].tolist()}")
+
+    return pd.DataFrame({'Seconds': seconds, 'Status': status})
+
+# Function to parse a single swim time
+def time_to_seconds(value):
+    """Scalar form of parse_times for one cell: seconds, or None when there is no time.
+
+    Follows the same rules as parse_times without building a Series, so the
+    row-by-row engine stays fast.
+    """
+    if not isinstance(value, str) and (value is None or pd.isna(value)):
+        return None
+    text = str(value)
+    if text.strip().upper() == 'NT':
+        return None
+    parts = text.replace('DQ', '').strip().split(':')
+    try:
+        numbers = [float(part) for part in parts]
+    except ValueError:
+        numbers = None
+    if numbers is None or len(numbers) > 3:
+        flags = text.strip().upper()
+        if 'DQ' not in flags and 'DNF' not in flags:
+            logger.error(f"Error converting time {text}")
+        return None
+    seconds = 0.0
+    for number in numbers:
+        seconds = seconds * 60 + number
+    # Rounded like Series.round(2), so both forms agree to the last digit
+    return round(seconds * 100) / 100
+
+# Function to calculate the improvement of one swim (scalar form of time_improvements)
+def time_improvement(seed_seconds, finals_seconds):
+    if seed_seconds is None or finals_seconds is None or pd.isna(seed_seconds) or pd.isna(finals_seconds):
+        return None
+    difference = finals_seconds - seed_seconds
+    return round(difference * 100) / 100 if difference <= 0 else None
+
+# Function to convert a column of swim times to seconds
+def times_to_seconds(times):
+    return parse_times(times)['Seconds']
+
+# Function to calculate the improvement (negative or zero time difference) for whole columns
+def time_improvements(seed_seconds, finals_seconds):
+    difference = finals_seconds - seed_seconds
+    return difference.where(difference <= 0).round(2)
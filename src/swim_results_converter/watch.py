@@ -0,0 +1,52 @@
+import logging
+import os
+import time
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Function to list the input workbooks with their size and modification time
+def snapshot(input_dir):
+    signatures = {}
+    for file_name in os.listdir(input_dir):
+        # Skip Excel lock files (e.g. "~$2025-meet1-results.xlsx") written while a workbook is open
+        if file_name.startswith('~$') or not file_name.endswith(('.xls', '.xlsx')):
+            continue
+        try:
+            stat = os.stat(os.path.join(input_dir, file_name))
+        except OSError:
+            # The file was removed or replaced between listing and stat
+            continue
+        signatures[file_name] = (stat.st_size, stat.st_mtime_ns)
+    return signatures
+
+# Function to poll an input directory and yield the workbooks that changed
+def watch_directory(input_dir, poll_interval=2.0, settle_time=2.0):
+    """Poll input_dir and yield sorted lists of new or updated workbooks.
+
+    A changed file is only yielded once its size and modification time have
+    stayed the same for settle_time seconds, so a workbook that is still being
+    exported is not read half written. Runs until interrupted.
+    """
+    known = snapshot(input_dir)
+    pending = {}
+    while True:
+        time.sleep(poll_interval)
+        current = snapshot(input_dir)
+        now = time.monotonic()
+
+        # Restart the settle timer whenever a file changes again
+        for file_name, signature in current.items():
+            if known.get(file_name) != signature and pending.get(file_name, (None,))[0] != signature:
+                pending[file_name] = (signature, now)
+        for file_name in set(known) - set(current):
+            logger.info(f"Input file removed: {file_name}")
+            del known[file_name]
+        for file_name in set(pending) - set(current):
+            del pending[file_name]
+
+        ready = sorted(file_name for file_name, (signature, since) in pending.items() if now - since >= settle_time)
+        if ready:
+            for file_name in ready:
+                known[file_name] = pending.pop(file_name)[0]
+            yield ready